@@ -1,5 +1,6 @@
 import re
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
 from pathlib import Path
 from time import time
@@ -8,6 +9,8 @@ from typing import List, Optional
 import nox
 
 nox.options.sessions = ["lint", "test"]
+nox.options.reuse_existing_virtualenvs = True
+nox.options.stop_on_first_error = True
 
 
 @nox.session(python="3.8")
@@ -25,7 +28,15 @@ def lint(session: nox.Session) -> None:
 @nox.session(python="3.8")
 def test(session: nox.Session) -> None:
     session.install(".[test]")
-    session.run("pytest", *session.posargs)
+
+    if session.posargs:
+        args = session.posargs
+    else:
+        # Keep each file on a single worker; the sample projects share a
+        # download location.
+        args = ["-n", "auto", "--dist=loadfile"]
+
+    session.run("pytest", *args)
 
 
 def get_version_from_arguments(arguments: List[str]) -> Optional[str]:
@@ -53,27 +64,28 @@ def get_version_from_arguments(arguments: List[str]) -> Optional[str]:
 
 
 def perform_git_checks(session: nox.Session, version_tag: str) -> None:
+    # These are independent queries, so run them concurrently.
+    def git(*args: str) -> "subprocess.CompletedProcess[str]":
+        return subprocess.run(["git", *args], capture_output=True, encoding="utf-8")
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        branch_future = executor.submit(git, "rev-parse", "--abbrev-ref", "HEAD")
+        status_future = executor.submit(git, "status", "--porcelain")
+        tag_future = executor.submit(git, "rev-parse", version_tag)
+
     # Ensure we're on master branch for cutting a release.
-    result = subprocess.run(
-        ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-        capture_output=True,
-        encoding="utf-8",
-    )
+    result = branch_future.result()
     if result.stdout != "master\n":
         session.error(f"Not on master branch: {result.stdout!r}")
 
     # Ensure there are no uncommitted changes.
-    result = subprocess.run(
-        ["git", "status", "--porcelain"], capture_output=True, encoding="utf-8"
-    )
+    result = status_future.result()
     if result.stdout:
         print(result.stdout)
         session.error("The working tree has uncommitted changes")
 
     # Ensure this tag doesn't exist already.
-    result = subprocess.run(
-        ["git", "rev-parse", version_tag], capture_output=True, encoding="utf-8"
-    )
+    result = tag_future.result()
     if not result.returncode:
         session.error(f"Tag already exists! {version_tag} -- {result.stdout!r}")
 
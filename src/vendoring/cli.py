@@ -6,11 +6,11 @@ import click
 
 from vendoring.configuration import load_configuration
 from vendoring.errors import VendoringError
-from vendoring.interactive import interactive_updates
-from vendoring.sync import run_sync
-from vendoring.tasks.update import update_requirements
 from vendoring.ui import UI
 
+# NOTE: The task modules are imported within each command, so that only the
+#       code needed for the invoked command is loaded.
+
 _EntryPoint = Callable[..., None]
 _Param = Callable[[_EntryPoint], _EntryPoint]
 
@@ -37,6 +37,8 @@ def main() -> None:
 @template.verbose
 def sync(verbose: bool) -> None:
     """Vendor libraries as described in lockfile"""
+    from vendoring.sync import run_sync
+
     UI.verbose = verbose
     project_path = Path()
 
@@ -56,6 +58,8 @@ def sync(verbose: bool) -> None:
 @template.package
 def update(verbose: bool, package: Optional[str]) -> None:
     """Update a single package version"""
+    from vendoring.tasks.update import update_requirements
+
     UI.verbose = verbose
     project_path = Path()
 
@@ -82,6 +86,8 @@ def update_interactive(
     verbose: bool, skip: List[str], only: List[str], from_start: bool
 ) -> None:
     """Update all package versions, interactively"""
+    from vendoring.interactive import interactive_updates
+
     UI.verbose = verbose
     project_path = Path()
 
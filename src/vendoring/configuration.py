@@ -3,21 +3,86 @@
 
 # mypy: allow-any-generics, allow-any-explicit
 
+import os
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from jsonschema import ValidationError, validate
-from tomli import TOMLDecodeError
-from tomli import loads as parse_toml
+from jsonschema import Draft7Validator
+from jsonschema.exceptions import best_match
 
 from vendoring.errors import ConfigurationError
 from vendoring.ui import UI
 
+if sys.version_info >= (3, 11):
+    from tomllib import TOMLDecodeError
+    from tomllib import load as load_toml
+else:
+    from tomli import TOMLDecodeError
+    from tomli import load as load_toml
+
+_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["destination", "namespace", "requirements"],
+    "properties": {
+        "destination": {"type": "string"},
+        "namespace": {"type": "string"},
+        "requirements": {"type": "string"},
+        "protected-files": {"type": "array", "items": {"type": "string"}},
+        "patches-dir": {"type": "string"},
+        "transformations": {
+            "type": "object",
+            "additionalProperties": False,
+            "properties": {
+                "substitute": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "required": ["match", "replace"],
+                        "properties": {
+                            "match": {"type": "string"},
+                            "replace": {"type": "string"},
+                        },
+                    },
+                },
+                "drop": {"type": "array", "items": {"type": "string"}},
+            },
+        },
+        "license": {
+            "type": "object",
+            "additionalProperties": False,
+            "properties": {
+                "directories": {
+                    "type": "object",
+                    "patternProperties": {"^.*$": {"type": "string"}},
+                },
+                "fallback-urls": {
+                    "type": "object",
+                    "patternProperties": {"^.*$": {"type": "string"}},
+                },
+                "download-from-pypi": {"type": "boolean"},
+            },
+        },
+        "typing-stubs": {
+            "type": "object",
+            "patternProperties": {
+                "^.*$": {"type": "array", "items": {"type": "string"}},
+            },
+        },
+    },
+}
+_VALIDATOR = Draft7Validator(_SCHEMA)
+
+# Shared default for optional tables; only ever read from.
+_EMPTY: Dict[str, Any] = {}
+
 
 @dataclass
 class Configuration:
-    # Base directory for all of the operation of this project
+    # Base directory for all of the operation of this project (already resolved)
     base_directory: Path
 
     # Location to unpack into
@@ -40,6 +105,8 @@ class Configuration:
     license_fallback_urls: Dict[str, str]
     # Alternate directory name, when distribution name differs from the package name
     license_directories: Dict[str, str]
+    # Download the artifacts for licenses directly from PyPI, instead of with pip
+    license_download_from_pypi: bool
 
     # Overrides for which stub files are generated
     typing_stubs: Dict[str, List[str]]
@@ -54,67 +121,13 @@ class Configuration:
         expecting paths to be within `location`.
         """
 
-        schema = {
-            "type": "object",
-            "additionalProperties": False,
-            "required": ["destination", "namespace", "requirements"],
-            "properties": {
-                "destination": {"type": "string"},
-                "namespace": {"type": "string"},
-                "requirements": {"type": "string"},
-                "protected-files": {"type": "array", "items": {"type": "string"}},
-                "patches-dir": {"type": "string"},
-                "transformations": {
-                    "type": "object",
-                    "additionalProperties": False,
-                    "properties": {
-                        "substitute": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "additionalProperties": False,
-                                "required": ["match", "replace"],
-                                "properties": {
-                                    "match": {"type": "string"},
-                                    "replace": {"type": "string"},
-                                },
-                            },
-                        },
-                        "drop": {"type": "array", "items": {"type": "string"}},
-                    },
-                },
-                "license": {
-                    "type": "object",
-                    "additionalProperties": False,
-                    "properties": {
-                        "directories": {
-                            "type": "object",
-                            "patternProperties": {"^.*$": {"type": "string"}},
-                        },
-                        "fallback-urls": {
-                            "type": "object",
-                            "patternProperties": {"^.*$": {"type": "string"}},
-                        },
-                    },
-                },
-                "typing-stubs": {
-                    "type": "object",
-                    "patternProperties": {
-                        "^.*$": {"type": "array", "items": {"type": "string"}},
-                    },
-                },
-            },
-        }
-
-        try:
-            validate(dictionary, schema)
-        except ValidationError as e:
-            raise ConfigurationError(str(e))
+        error = best_match(_VALIDATOR.iter_errors(dictionary))
+        if error is not None:
+            raise ConfigurationError(str(error))
 
-        def path_or_none(key: str) -> Optional[Path]:
-            if key in dictionary:
-                return Path(dictionary[key])
-            return None
+        patches_dir = dictionary.get("patches-dir")
+        transformations = dictionary.get("transformations", _EMPTY)
+        license_config = dictionary.get("license", _EMPTY)
 
         return Configuration(
             base_directory=location,
@@ -122,35 +135,47 @@ class Configuration:
             namespace=dictionary["namespace"],
             requirements=Path(dictionary["requirements"]),
             protected_files=dictionary.get("protected-files", []),
-            patches_dir=path_or_none("patches-dir"),
-            substitute=dictionary.get("transformations", {}).get("substitute", {}),
-            drop_paths=dictionary.get("transformations", {}).get("drop", []),
-            license_fallback_urls=dictionary.get("license", {}).get(
-                "fallback-urls", {}
-            ),
-            license_directories=dictionary.get("license", {}).get("directories", {}),
+            patches_dir=Path(patches_dir) if patches_dir is not None else None,
+            substitute=transformations.get("substitute", []),
+            drop_paths=transformations.get("drop", []),
+            license_fallback_urls=license_config.get("fallback-urls", {}),
+            license_directories=license_config.get("directories", {}),
+            license_download_from_pypi=license_config.get("download-from-pypi", False),
             typing_stubs=dictionary.get("typing-stubs", {}),
         )
 
 
+# Loaded configurations, keyed on (resolved path, mtime, size) of pyproject.toml.
+_CONFIG_CACHE: Dict[Tuple[str, int, int], Configuration] = {}
+
+
 def load_configuration(directory: Path) -> Configuration:
+    # Resolve once; everything downstream uses the resolved `base_directory`.
+    directory = directory.resolve()
+
     # Read the contents of the file.
     file = directory / "pyproject.toml"
     UI.log(f"Will attempt to load {file}.")
 
     try:
-        file_contents = file.read_text(encoding="utf8")
-    except IOError as read_error:
+        st = os.stat(file)
+        key = (str(file), st.st_mtime_ns, st.st_size)
+    except OSError as read_error:
         raise ConfigurationError("Could not read pyproject.toml.") from read_error
-    else:
-        UI.log("Read configuration file.")
+
+    if key in _CONFIG_CACHE:
+        UI.log("Using previously loaded configuration.")
+        return _CONFIG_CACHE[key]
 
     try:
-        parsed_contents = parse_toml(file_contents)
+        with file.open("rb") as f:
+            parsed_contents = load_toml(f)
+    except IOError as read_error:
+        raise ConfigurationError("Could not read pyproject.toml.") from read_error
     except TOMLDecodeError as toml_error:
         raise ConfigurationError("Could not parse pyproject.toml.") from toml_error
     else:
-        UI.log("Parsed configuration file.")
+        UI.log("Read and parsed configuration file.")
 
     if (
         "tool" not in parsed_contents
@@ -171,4 +196,6 @@ def load_configuration(directory: Path) -> Configuration:
         )
     else:
         UI.log("Validated configuration.")
-        return retval
+
+    _CONFIG_CACHE[key] = retval
+    return retval
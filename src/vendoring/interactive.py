@@ -14,7 +14,7 @@ from vendoring.errors import VendoringError
 from vendoring.sync import run_sync
 from vendoring.tasks.update import (
     PinnedPackageInfo,
-    determine_latest_release,
+    determine_latest_releases,
     parse_pinned_packages,
 )
 from vendoring.ui import UI
@@ -45,10 +45,14 @@ class InteractionState:
         packages = parse_pinned_packages(self._requirements)
         self._packages = {p.name: p for p in packages}
         self._package_order = [p.name for p in packages]
+        # Formatted requirement lines, updated as packages are updated.
+        self._lines = {p.name: str(p) for p in packages}
 
-        self._current_package: str | None = None
-        if self._state_file.exists():
+        self._current_package: str | None
+        try:
             self._current_package = self._state_file.read_text()
+        except FileNotFoundError:
+            self._current_package = None
 
     @property
     def packages(self) -> tuple[tuple[str, str], ...]:
@@ -76,19 +80,22 @@ class InteractionState:
     def update(self, package_name: str, version: str) -> None:
         """Update the state of the session."""
         self._packages[package_name].version = version
-        with self._requirements.open("w", encoding="utf-8") as f:
-            f.writelines(f"{self._packages[p]}\n" for p in self._package_order)
+        self._lines[package_name] = str(self._packages[package_name])
+        self._requirements.write_text(
+            "".join(f"{self._lines[p]}\n" for p in self._package_order),
+            encoding="utf-8",
+        )
 
         self._current_package = package_name
-        if not self._state_file.parent.exists():
-            self._state_file.parent.mkdir()
+        self._state_file.parent.mkdir(parents=True, exist_ok=True)
         self._state_file.write_text(package_name)
 
     def cleanup(self) -> None:
-        if not self._state_file.exists():
+        try:
+            self._state_file.unlink()
+        except FileNotFoundError:
             return
 
-        self._state_file.unlink()
         self._state_file.parent.rmdir()
 
 
@@ -111,6 +118,9 @@ def do_one_update(config: Configuration, *, name: str, version: str) -> None:
     news_file.write_text(message + "\n")  # "\n" appeases end-of-line-fixer
 
     # Commit the changes
+    # NOTE: This can't be a single `git commit -- <news_file>`, since pathspecs
+    #       given to `git commit` must already be known to git, and the news file
+    #       is new. It would also exclude anything that is already staged.
     git("add", str(news_file))
     git("commit", "-m", message)
 
@@ -162,6 +172,15 @@ def interactive_updates(
     package_names = determine_packages(
         state.packages, resuming_from=resuming_from, skip=skip, only=only
     )
+    # When resuming, the packages up to the one we're resuming from (in the
+    # requirements file) are likely done already, so their lookups aren't worth
+    # prefetching. They are still visited, since the earlier run's filters may
+    # have been different; they're looked up as they're reached instead.
+    to_prefetch = package_names
+    if resuming_from is not None:
+        in_file_order = [name for name, _ in state.packages]
+        done = set(in_file_order[: in_file_order.index(resuming_from.name) + 1])
+        to_prefetch = [name for name in package_names if name not in done]
 
     def _present(package_info: PinnedPackageInfo, *, prefix: str | None = None) -> None:
         real_prefix = f"{prefix} " if prefix else ""
@@ -172,6 +191,9 @@ def interactive_updates(
             f"{_click.style(package_info.version, fg='magenta')}"
         )
 
+    with UI.task("Determine latest releases"):
+        latest_versions = determine_latest_releases(to_prefetch)
+
     if resuming_from is not None:
         _present(resuming_from, prefix="Resuming from")
         with UI.indent():
@@ -186,7 +208,11 @@ def interactive_updates(
         for package_info in state.get_info(package_names):
             _present(package_info)
             with UI.indent():
-                latest_version = determine_latest_release(package_info.name)
+                if package_info.name not in latest_versions:
+                    latest_versions.update(
+                        determine_latest_releases([package_info.name])
+                    )
+                latest_version = latest_versions[package_info.name]
                 if Version(latest_version) <= Version(package_info.version):
                     UI.log("Already up-to-date")
                     continue
@@ -1,27 +1,33 @@
 """Logic for cleaning up already vendored files.
 """
 
+import os
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Tuple
 
 from vendoring.configuration import Configuration
-from vendoring.utils import remove_all
+from vendoring.utils import remove_items
 
 
 def determine_items_to_remove(
     destination: Path, *, files_to_skip: List[str]
-) -> Iterable[Path]:
+) -> Iterable[Tuple[Path, bool]]:
+    """Yields (item, is a real directory) pairs, for the items to remove."""
     if not destination.exists():
         # Folder does not exist, nothing to cleanup.
         return
 
-    for item in destination.iterdir():
-        if item.is_dir():
+    # The listing is read fully upfront, since the caller removes items from it.
+    with os.scandir(destination) as it:
+        entries = list(it)
+
+    for entry in entries:
+        if entry.is_dir():
             # Directory
-            yield item
-        elif item.name not in files_to_skip:
+            yield Path(entry.path), not entry.is_symlink()
+        elif entry.name not in files_to_skip:
             # File, not in files_to_skip
-            yield item
+            yield Path(entry.path), False
 
 
 def cleanup_existing_vendored(config: Configuration) -> None:
@@ -30,4 +36,4 @@ def cleanup_existing_vendored(config: Configuration) -> None:
     items = determine_items_to_remove(destination, files_to_skip=config.protected_files)
 
     # TODO: log how many items were removed.
-    remove_all(items, protected=[config.requirements])
+    remove_items(items, protected=[config.requirements])
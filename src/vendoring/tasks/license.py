@@ -1,50 +1,66 @@
+import os
+import re
 import shutil
 import tarfile
 import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from operator import attrgetter, methodcaller
 from pathlib import Path
-from typing import Dict, Iterator, List, Tuple, Union
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import requests
 
 from vendoring.configuration import Configuration
+from vendoring.errors import RequirementsError, VendoringError
+from vendoring.tasks.update import PinnedPackageInfo, parse_pinned_packages
 from vendoring.ui import UI
-from vendoring.utils import run
+from vendoring.utils import close_session, get_session, run
 
 Archive = Union[tarfile.TarFile, zipfile.ZipFile]
 ArchiveMember = Union[tarfile.TarInfo, zipfile.ZipInfo]
-ArchiveMembers = Union[List[tarfile.TarInfo], List[zipfile.ZipInfo]]
+ArchiveMembers = Iterable[ArchiveMember]
+# Gets the filename of a member; picked once per archive, based on its type.
+MemberName = Callable[[ArchiveMember], str]
+# Whether a member is a directory; also picked once per archive.
+MemberIsDir = Callable[[ArchiveMember], bool]
 
-
-def _get_filename_from_archive_member(member: ArchiveMember) -> str:
-    if isinstance(member, tarfile.TarInfo):
-        return member.name
-    return member.filename
+_COPY_BUFFER_SIZE = 64 * 1024
+_LICENSE_NAME_REGEX = re.compile("LICENSE|COPYING")
+_VERSION_START_REGEX = re.compile(r"(?:^|-)[0-9]")
 
 
 @contextmanager
-def _open_archive(artifact: Path) -> Iterator[Tuple[Archive, ArchiveMembers]]:
+def _open_archive(
+    artifact: Path,
+) -> Iterator[Tuple[Archive, ArchiveMembers, MemberName, MemberIsDir]]:
     if artifact.suffix in [".zip", ".whl"]:
         with zipfile.ZipFile(artifact) as zip_archive:
-            yield zip_archive, zip_archive.infolist()
+            yield (
+                zip_archive,
+                zip_archive.infolist(),
+                attrgetter("filename"),
+                methodcaller("is_dir"),
+            )
     elif artifact.suffix == ".gz":
         assert artifact.suffixes[-2:] == [".tar", ".gz"]
+        # Not stream mode: extracting a (sym)linked member needs random access.
         with tarfile.open(artifact) as tarball:
-            yield tarball, tarball.getmembers()
+            # Iterating reads members lazily, unlike getmembers().
+            yield tarball, tarball, attrgetter("name"), methodcaller("isdir")
     else:
         raise Exception(f"Unknown archive extension: {artifact.name}")
 
 
 def _get_library_name_from_artifact_name(artifact_name: str) -> str:
     """Reconstruct the library name, from the name of an artifact containing it."""
-    parts = []
-    for part in artifact_name.split("-"):
-        if part[0].isdigit():
-            break
-        parts.append(part)
-    return "-".join(parts)
+    # The name ends where a "-" separated part starts with a digit (the version).
+    match = _VERSION_START_REGEX.search(artifact_name)
+    if match is None:
+        return artifact_name
+    return artifact_name[: match.start()]
 
 
 @dataclass
@@ -53,60 +69,116 @@ class LicenseExtractor:
     license_directories: Dict[str, str]
     license_fallback_urls: Dict[str, str]
 
-    @staticmethod
-    def download_from_url(url: str, dest: Path) -> None:
+    # Shared across downloads, so that connections get reused
+    session: requests.Session = field(
+        default_factory=get_session, init=False, repr=False
+    )
+    # Cache of get_library_directory results, to avoid repeating the stat calls
+    _library_directories: Dict[str, Optional[str]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    def download_from_url(self, url: str, dest: Path) -> None:
         UI.log(f"Downloading {url}")
-        r = requests.get(url, allow_redirects=True)
+        r = self.session.get(url, allow_redirects=True, timeout=30)
         r.raise_for_status()
         dest.write_bytes(r.content)
 
     @staticmethod
-    def find_licenses(members: ArchiveMembers) -> Iterator[ArchiveMember]:
+    def find_licenses(
+        members: ArchiveMembers, member_name: MemberName, is_dir: MemberIsDir
+    ) -> Iterator[ArchiveMember]:
         for member in members:
-            name = _get_filename_from_archive_member(member)
+            # Directories (like LICENSES/) have nothing to extract.
+            if is_dir(member):
+                continue
 
-            if "LICENSE" in name or "COPYING" in name:
+            name = member_name(member)
+            if _LICENSE_NAME_REGEX.search(name):
                 if "/test" in name:  # some testing licenses in html5lib and distlib
                     UI.log(f"Ignoring {name}")
                     continue
                 yield member
 
-    def get_license_destination(self, library: str, filename: str) -> Path:
-        """Given the (reconstructed) library name, find appropriate destination"""
+    @classmethod
+    def find_wheel_licenses(
+        cls,
+        artifact_name: str,
+        members: ArchiveMembers,
+        member_name: MemberName,
+        is_dir: MemberIsDir,
+    ) -> List[ArchiveMember]:
+        """Find the wheel's licenses, preferring its .dist-info directory's ones."""
+        name, version = artifact_name.split("-")[:2]
+        prefix = f"{name}-{version}.dist-info/"
+
+        # A single scan of the members, with the (few) licenses found then split.
+        licenses = list(cls.find_licenses(members, member_name, is_dir))
+        in_dist_info = [
+            member for member in licenses if member_name(member).startswith(prefix)
+        ]
+        return in_dist_info or licenses
+
+    def get_library_directory(self, library: str) -> Optional[str]:
+        """Given the (reconstructed) library name, find its directory in destination"""
+        if library in self._library_directories:
+            return self._library_directories[library]
+
+        retval: Optional[str] = None
+        if (self.destination / library).is_dir():
+            retval = library
+        elif (self.destination / library.lower()).is_dir():
+            retval = library.lower()
+        elif library in self.license_directories:
+            retval = self.license_directories[library]
+
+        self._library_directories[library] = retval
+        return retval
+
+    def get_license_location(self, library: str, filename: str) -> str:
+        """Like get_license_destination, but relative to destination"""
         assert "/" not in filename, filename
-        if (normal := self.destination / library).is_dir():
-            return normal / filename
-        if (lowercase := self.destination / library.lower()).is_dir():
-            return lowercase / filename
-        if library in self.license_directories:
-            return self.destination / self.license_directories[library] / filename
+        directory = self.get_library_directory(library)
+        if directory is not None:
+            return f"{directory}/{filename}"
 
         # fallback to library.LICENSE (used for non-import-package libraries)
-        return self.destination / f"{library}.{filename}"
+        return f"{library}.{filename}"
+
+    def get_license_destination(self, library: str, filename: str) -> Path:
+        """Given the (reconstructed) library name, find appropriate destination"""
+        return self.destination / self.get_license_location(library, filename)
 
     def extract_license_member(
-        self, artifact: Path, archive: Archive, member: ArchiveMember
+        self,
+        artifact: Path,
+        archive: Archive,
+        member: ArchiveMember,
+        license_filename: str,
     ) -> None:
+        """Extract `member`, which is a license named `license_filename`."""
         library_name = _get_library_name_from_artifact_name(artifact.name)
-        license_filename = Path(_get_filename_from_archive_member(member)).name
-        dest = self.get_license_destination(library_name, license_filename)
+        location = self.get_license_location(library_name, license_filename)
+        dest = self.destination / location
 
-        UI.log(
-            f"Extracting {license_filename} into {dest.relative_to(self.destination)}"
-        )
+        UI.log(f"Extracting {license_filename} into {location}")
 
         # Oh, the joys of mypy.
+        source: IO[bytes]
         if isinstance(archive, zipfile.ZipFile):
             assert isinstance(member, zipfile.ZipInfo)
-            dest.write_bytes(archive.read(member))
+            source = archive.open(member)
         else:
             assert isinstance(archive, tarfile.TarFile)
             assert isinstance(member, tarfile.TarInfo)
 
             file = archive.extractfile(member)
             assert file
+            source = file
 
-            dest.write_bytes(file.read())
+        # Stream the contents, instead of holding the whole file in memory.
+        with source, dest.open("wb") as f:
+            shutil.copyfileobj(source, f, _COPY_BUFFER_SIZE)
 
     def use_license_fallback(self, artifact_name: str) -> None:
         library_name = _get_library_name_from_artifact_name(artifact_name)
@@ -121,18 +193,38 @@ class LicenseExtractor:
 
     def extract_license_from_artifact(self, artifact: Path) -> None:
         with _open_archive(artifact) as archive_info:
-            archive, files = archive_info
-
-            licenses = list(self.find_licenses(files))
+            archive, files, member_name, is_dir = archive_info
+
+            licenses: Iterable[ArchiveMember]
+            if artifact.suffix == ".whl":
+                licenses = self.find_wheel_licenses(
+                    artifact.name, files, member_name, is_dir
+                )
+            else:
+                licenses = self.find_licenses(files, member_name, is_dir)
+
+            # Extract each license as the scan reaches it. For tarballs, going
+            # back to an earlier member means decompressing from the start again.
+            # Licenses with the same filename end up in the same place. Keep the
+            # least nested one (it's the project's own), instead of overwriting it.
+            extracted: Dict[str, int] = {}  # filename -> depth of the extracted one
             for found in licenses:
-                self.extract_license_member(artifact, archive, found)
+                name = member_name(found)
+                # Archive member names always use "/", so no need for a Path here.
+                _, _, license_filename = name.rpartition("/")
+                depth = name.count("/")
+                if extracted.get(license_filename, depth + 1) <= depth:
+                    UI.log(f"Ignoring {name}")
+                    continue
+                self.extract_license_member(artifact, archive, found, license_filename)
+                extracted[license_filename] = depth
 
-        if not licenses:
+        if not extracted:
             UI.log(f"No license found in {artifact.name}, using fallback.")
             self.use_license_fallback(artifact.name)
 
 
-def download_distributions(location: Path, requirements: Path) -> None:
+def _pip_download_distributions(location: Path, requirements: Path) -> None:
     cmd = [
         "pip",
         "download",
@@ -142,7 +234,123 @@ def download_distributions(location: Path, requirements: Path) -> None:
         "--dest",
         str(location),
     ]
-    run(cmd, working_directory=None)
+    run(cmd, working_directory=None, quiet=True)
+
+
+def _is_pure_python3_wheel(filename: str) -> bool:
+    """Whether the wheel is usable on any Python 3 (like py3 or py2.py3 ones)."""
+    if not filename.endswith("-none-any.whl"):
+        return False
+    python_tags = filename.split("-")[-3].split(".")
+    return "py3" in python_tags
+
+
+def _select_distribution(
+    session: requests.Session, package: PinnedPackageInfo
+) -> Tuple[str, str]:
+    """Pick a pure-Python 3 wheel (or the sdist) for `package`, from PyPI's JSON API.
+
+    This isn't pip's selection: `pip download` would pick the wheel best matching
+    the running interpreter and platform, which may be a platform-specific one.
+    The artifact picked here may ship different license files from it.
+
+    Returns the URL and filename of the distribution.
+    """
+    r = session.get(
+        f"https://pypi.org/pypi/{package.name}/{package.version}/json", timeout=30
+    )
+    r.raise_for_status()
+    try:
+        files = r.json()["urls"]
+
+        for file in files:
+            if file["packagetype"] == "bdist_wheel" and _is_pure_python3_wheel(
+                file["filename"]
+            ):
+                return str(file["url"]), str(file["filename"])
+        for file in files:
+            if file["packagetype"] == "sdist":
+                return str(file["url"]), str(file["filename"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise VendoringError(
+            f"Unexpected response from PyPI for {package.name}=={package.version}: "
+            f"{e!r}"
+        )
+
+    raise VendoringError(
+        f"Could not find a pure-Python wheel or an sdist for "
+        f"{package.name}=={package.version}"
+    )
+
+
+def _download_distribution(
+    session: requests.Session, package: PinnedPackageInfo, location: Path
+) -> None:
+    try:
+        url, filename = _select_distribution(session, package)
+
+        UI.log(f"Downloading {url}")
+        with session.get(url, stream=True, timeout=30) as r:
+            r.raise_for_status()
+            with (location / filename).open("wb") as f:
+                for chunk in r.iter_content(chunk_size=65536):
+                    f.write(chunk)
+    except requests.RequestException as e:
+        raise VendoringError(
+            f"Could not download {package.name}=={package.version}: {e!r}"
+        )
+
+
+def _needs_pip(package: PinnedPackageInfo) -> bool:
+    """Whether the line has anything (like markers or hashes) beyond the pin."""
+    suffix = package.suffix.strip()
+    return bool(suffix) and not suffix.startswith("#")
+
+
+def download_distributions(
+    location: Path, requirements: Path, *, from_pypi: bool = False
+) -> None:
+    """Download the artifacts for all the requirements, into `location`.
+
+    By default, that's done with pip, so they come from wherever pip is configured
+    to get packages from. With `from_pypi`, pinned requirements are downloaded
+    straight from PyPI instead, which is faster, but ignores pip's configuration.
+    """
+    if not from_pypi:
+        _pip_download_distributions(location, requirements)
+        return
+
+    try:
+        packages = parse_pinned_packages(requirements)
+    except RequirementsError:
+        UI.log("Requirements are not all pinned, using pip to download them.")
+        _pip_download_distributions(location, requirements)
+        return
+
+    # pip's hash checking applies to the whole file once any line has a hash.
+    if any(map(_needs_pip, packages)):
+        UI.log("Requirements have markers or options, using pip to download them.")
+        _pip_download_distributions(location, requirements)
+        return
+
+    # Fetch directly from PyPI, concurrently and over shared connections, rather
+    # than paying for pip's startup and its serial downloads.
+    location.mkdir(parents=True, exist_ok=True)
+    session = get_session()
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            futures = [
+                executor.submit(_download_distribution, session, package, location)
+                for package in packages
+            ]
+            for future in futures:
+                future.result()
+    except VendoringError as e:
+        # PyPI's JSON API doesn't know about pip's index configuration, so let pip
+        # have a go instead (starting over, to not end up with two artifacts).
+        UI.log(f"{e}, using pip to download the requirements.")
+        shutil.rmtree(location)
+        _pip_download_distributions(location, requirements)
 
 
 def fetch_licenses(config: Configuration) -> None:
@@ -153,14 +361,24 @@ def fetch_licenses(config: Configuration) -> None:
 
     tmp_dir = Path(tempfile.gettempdir(), "vendoring-downloads")
     try:
-        download_distributions(tmp_dir, requirements)
+        download_distributions(
+            tmp_dir, requirements, from_pypi=config.license_download_from_pypi
+        )
 
         license_extractor = LicenseExtractor(
             destination=destination,
             license_directories=license_directories,
             license_fallback_urls=license_fallback_urls,
         )
-        for artifact in tmp_dir.iterdir():
-            license_extractor.extract_license_from_artifact(artifact)
+        # Artifacts are independent of each other, and the work is mostly I/O and
+        # decompression (which release the GIL), so extract them concurrently.
+        max_workers = min(8, os.cpu_count() or 4)
+        with os.scandir(tmp_dir) as entries:
+            artifacts = [Path(entry.path) for entry in entries]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(
+                executor.map(license_extractor.extract_license_from_artifact, artifacts)
+            )
     finally:
+        close_session()
         shutil.rmtree(tmp_dir)
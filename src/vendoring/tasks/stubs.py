@@ -7,7 +7,7 @@ the correct declarations.
 
 import os
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Set, Tuple
 
 from vendoring.configuration import Configuration
 
@@ -32,10 +32,6 @@ def determine_stub_files(
 
 
 def write_stub(stub_location: Path, import_name: str) -> None:
-    # Create the parent directories if needed.
-    if not stub_location.parent.exists():
-        stub_location.parent.mkdir()
-
     # Write `from ... import *` in the stub file.
     stub_location.write_text("from %s import *" % import_name)
 
@@ -44,9 +40,16 @@ def generate_stubs(config: Configuration, libraries: List[str]) -> None:
     destination = config.destination
     typing_stubs = config.typing_stubs
 
+    created_directories: Set[Path] = set()
     for lib in libraries:
+        if (destination / lib / "py.typed").is_file():  # Already have types.
+            continue
         for rel_location, import_name in determine_stub_files(lib, typing_stubs):
-            if (destination / lib / "py.typed").is_file():  # Already have types.
-                continue
             stub_location = destination / rel_location
+
+            # Create the parent directories if needed, once per directory.
+            if stub_location.parent not in created_directories:
+                stub_location.parent.mkdir(parents=True, exist_ok=True)
+                created_directories.add(stub_location.parent)
+
             write_stub(stub_location, import_name)
@@ -1,17 +1,23 @@
 """Logic for updating a vendoring-related requirements.txt file.
 """
 
+import functools
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import requests
 from packaging.version import VERSION_PATTERN, Version
 
 from vendoring.configuration import Configuration
 from vendoring.errors import RequirementsError, VendoringError
 from vendoring.ui import UI
+from vendoring.utils import get_session
+
+if TYPE_CHECKING:
+    import requests
 
 _PATTERN = r"""
 ^
@@ -42,36 +48,61 @@ class PinnedPackageInfo:
         return f"{self.prefix}{self.name}=={self.version}{self.suffix}"
 
 
-def parse_pinned_packages(requirements: Path) -> List[PinnedPackageInfo]:
+@functools.lru_cache(maxsize=None)
+def _parse_requirements_file(
+    path: str, mtime_ns: int, size: int
+) -> Tuple[Tuple[str, str, str, str], ...]:
     failed = []
     retval = []
-    all_lines = requirements.read_text().splitlines()
+    all_lines = Path(path).read_text().splitlines()
     for i, line in enumerate(all_lines):
-        match = _REGEX.match(line)
+        # Cheap check, to avoid running the (large) version regex on lines that
+        # can't be a pinned requirement.
+        match = _REGEX.match(line) if "==" in line else None
         if match is None:
             failed.append((i + 1, line))
             continue
 
-        values = match.group("name", "version", "prefix", "suffix")
-        retval.append(PinnedPackageInfo(*values))
+        name, version, prefix, suffix = match.group(
+            "name", "version", "prefix", "suffix"
+        )
+        retval.append((name, version, prefix, suffix))
 
     if failed:
         raise RequirementsError(failed)
 
-    return retval
+    return tuple(retval)
+
 
+def parse_pinned_packages(requirements: Path) -> List[PinnedPackageInfo]:
+    # The parsed values are cached (keyed on the file's absolute path, mtime and
+    # size), but callers get fresh objects, since they're free to modify them.
+    st = os.stat(requirements)
+    parsed = _parse_requirements_file(
+        os.path.abspath(requirements), st.st_mtime_ns, st.st_size
+    )
+    return [PinnedPackageInfo(*values) for values in parsed]
 
-def determine_latest_release(name: str) -> str:
-    UI.log(f"Determining latest version for {name}...")
 
+def fetch_latest_release(session: "requests.Session", name: str) -> str:
+    """Get the latest version of `name` from PyPI, without logging anything."""
     try:
-        r = requests.get(f"https://pypi.org/pypi/{name}/json")
-        retval = str(r.json()["info"]["version"])
+        r = session.get(f"https://pypi.org/pypi/{name}/json", timeout=30)
+        return str(r.json()["info"]["version"])
     except Exception as e:
         raise VendoringError(f"Could not determine latest version for {name}: {e!r}")
 
-    with UI.indent():
-        UI.log(f"Got {retval}")
+
+def determine_latest_releases(names: List[str]) -> Dict[str, str]:
+    """Determine the latest release of all the given packages, concurrently."""
+    # Shared by the workers; getting it in each of them could create several.
+    fetch = functools.partial(fetch_latest_release, get_session())
+    # The workers don't log: UI.log is thread-safe, but UI.indent() is not.
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        retval = dict(zip(names, executor.map(fetch, names)))
+
+    for name, version in retval.items():
+        UI.log(f"{name}: {version}")
     return retval
 
 
@@ -79,9 +110,11 @@ def update_requirements(config: Configuration, package: Optional[str]) -> None:
     requirements = config.base_directory / config.requirements
 
     packages = parse_pinned_packages(requirements)
+    names = [pkg.name for pkg in packages if package is None or pkg.name == package]
+    latest_versions = determine_latest_releases(names)
     for pkg in packages:
-        if package is None or pkg.name == package:
-            latest = determine_latest_release(pkg.name)
+        if pkg.name in latest_versions:
+            latest = latest_versions[pkg.name]
             if Version(latest) != Version(pkg.version):
                 pkg.version = latest
 
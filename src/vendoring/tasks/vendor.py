@@ -1,17 +1,23 @@
 """Logic for adding/vendoring the relevant libraries.
 """
 
+import functools
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, NamedTuple, Tuple
 
 from vendoring.configuration import Configuration
 from vendoring.errors import VendoringError
 from vendoring.ui import UI
 from vendoring.utils import remove_all as _remove_all
-from vendoring.utils import remove_matching_regex as _remove_matching_regex
+from vendoring.utils import remove_matching_regexes as _remove_matching_regexes
 from vendoring.utils import run
 
+# Below this many files, starting worker processes costs more than it saves.
+_PARALLEL_REWRITE_THRESHOLD = 64
+
 
 def download_libraries(requirements: Path, destination: Path) -> None:
     command = [
@@ -28,7 +34,7 @@ def download_libraries(requirements: Path, destination: Path) -> None:
         # This includes all dependencies recursively up the chain.
         "--no-deps",
     ]
-    run(command, working_directory=None)
+    run(command, working_directory=None, quiet=True)
 
 
 def _looks_like_glob(pattern: str) -> bool:
@@ -36,15 +42,107 @@ def _looks_like_glob(pattern: str) -> bool:
 
 
 def remove_unnecessary_items(destination: Path, drop_paths: List[str]) -> None:
+    regexes = []
     for pattern in drop_paths:
         if pattern.startswith("^"):
-            _remove_matching_regex(destination, pattern)
+            regexes.append(pattern)
         elif _looks_like_glob(pattern):
             _remove_all(destination.glob(pattern), protected=[])
         else:
             location = pattern
             _remove_all([destination / location], protected=[])
 
+    # All the regexes are handled together, in a single walk of the tree.
+    _remove_matching_regexes(destination, regexes)
+
+
+class _ImportPatterns(NamedTuple):
+    mentions: "re.Pattern[bytes]"
+    import_: "re.Pattern[str]"
+    import_as: "re.Pattern[str]"
+    import_dotted: "re.Pattern[str]"
+    from_: "re.Pattern[str]"
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_import_patterns(vendored_libs: Tuple[str, ...]) -> _ImportPatterns:
+    """Compile patterns matching imports of any of the vendored_libs.
+
+    Using a single alternation for all the libraries means each file is scanned
+    once per pattern, rather than once per pattern per library. Longer names go
+    first, so that a name which prefixes another doesn't need backtracking.
+    """
+    libs = "|".join(map(re.escape, sorted(vendored_libs, key=len, reverse=True)))
+    return _ImportPatterns(
+        mentions=re.compile(libs.encode("utf-8")),
+        import_=re.compile(rf"^(\s*)import ({libs})(\s|$)", re.MULTILINE),
+        import_as=re.compile(rf"^(\s*)import ({libs})(\.\S+)(?=\s+as)", re.MULTILINE),
+        import_dotted=re.compile(rf"^\s*(import (?:{libs})\.\S+)", re.MULTILINE),
+        from_=re.compile(rf"^(\s*)from ({libs})(\.|\s)", re.MULTILINE),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_substitution(pattern: str) -> "re.Pattern[str]":
+    # Unlike re's own cache, this one doesn't get evicted by other patterns.
+    return re.compile(pattern)
+
+
+def rewrite_text_imports(
+    text: str,
+    namespace: str,
+    vendored_libs: List[str],
+    additional_substitutions: List[Dict[str, str]],
+    *,
+    location: str = "<string>",
+) -> str:
+    """Rewrite 'import xxx' and 'from xxx import' for vendored_libs, in `text`.
+
+    `location` is only used in error messages.
+    """
+    # Configurable rewriting of lines.
+    for di in additional_substitutions:
+        pattern, substitution = di["match"], di["replace"]
+        text = _compile_substitution(pattern).sub(substitution, text)
+
+    # If an empty namespace is provided, we don't rewrite imports.
+    if namespace == "" or not vendored_libs:
+        return text
+
+    patterns = _compile_import_patterns(tuple(vendored_libs))
+
+    # Normal case "import a"
+    text = patterns.import_.sub(rf"\g<1>from {namespace} import \g<2>\g<3>", text)
+    # Special case "import a.b as b"
+    text = patterns.import_as.sub(rf"\g<1>import {namespace}.\g<2>\g<3>", text)
+
+    # Error on "import a.b": this cannot be rewritten
+    # (except for the special case handled above)
+    match = patterns.import_dotted.search(text)
+    if match:
+        line_number = text.count("\n", 0, match.start()) + 1
+        raise VendoringError(
+            "Encountered import that cannot be transformed for a namespace.\n"
+            f'File "{location}", line {line_number}\n'
+            f"  {match.group(1)}\n"
+            "\n"
+            "You will need to add a patch, that adapts the code to avoid a "
+            "`import dotted.name` style import here; since those cannot be "
+            "transformed for importing via a namespace."
+        )
+
+    # Normal case "from a import b"
+    return patterns.from_.sub(rf"\g<1>from {namespace}.\g<2>\g<3>", text)
+
+
+def _has_native_line_endings(data: bytes) -> bool:
+    """Whether `data` only has the line endings that writing in text mode gives."""
+    if os.linesep == "\n":
+        return b"\r" not in data
+    # Every "\n" is part of a "\r\n", and there are no other "\r"s.
+    newlines = data.count(b"\n")
+    return data.count(b"\r\n") == newlines == data.count(b"\r")
+
 
 def rewrite_file_imports(
     item: Path,
@@ -54,59 +152,46 @@ def rewrite_file_imports(
 ) -> None:
     """Rewrite 'import xxx' and 'from xxx import' for vendored_libs."""
 
-    text = item.read_text(encoding="utf-8")
+    data = item.read_bytes()
+
+    # Skip decoding and rewriting files that can't need any changes. (substitutions
+    # could introduce imports, so only do this when there aren't any; and line
+    # endings get normalized, so files with other ones always need rewriting)
+    if not additional_substitutions and _has_native_line_endings(data):
+        # If an empty namespace is provided, we don't rewrite imports.
+        if namespace == "" or not vendored_libs:
+            return
+        # Every import statement contains this; a plain substring search is much
+        # cheaper than the regex below.
+        if b"import" not in data:
+            return
+        patterns = _compile_import_patterns(tuple(vendored_libs))
+        if patterns.mentions.search(data) is None:
+            return
+
+    original_text = data.decode("utf-8")
+    # Like reading in text mode, with universal newlines.
+    text = original_text.replace("\r\n", "\n").replace("\r", "\n")
+    text = rewrite_text_imports(
+        text,
+        namespace,
+        vendored_libs,
+        additional_substitutions,
+        location=str(item),
+    )
 
-    # Configurable rewriting of lines.
-    for di in additional_substitutions:
-        pattern, substitution = di["match"], di["replace"]
-        text = re.sub(pattern, substitution, text)
+    # Like writing in text mode, with the platform's line endings.
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    if text != original_text:
+        item.write_bytes(text.encode("utf-8"))
 
-    # If an empty namespace is provided, we don't rewrite imports.
-    if namespace != "":
-        for lib in vendored_libs:
-            # Normal case "import a"
-            text = re.sub(
-                rf"^(\s*)import {lib}(\s|$)",
-                rf"\1from {namespace} import {lib}\2",
-                text,
-                flags=re.MULTILINE,
-            )
-            # Special case "import a.b as b"
-            text = re.sub(
-                rf"^(\s*)import {lib}(\.\S+)(?=\s+as)",
-                rf"\1import {namespace}.{lib}\2",
-                text,
-                flags=re.MULTILINE,
-            )
-
-            # Error on "import a.b": this cannot be rewritten
-            # (except for the special case handled above)
-            match = re.search(
-                rf"^\s*(import {lib}\.\S+)",
-                text,
-                flags=re.MULTILINE,
-            )
-            if match:
-                line_number = text.count("\n", 0, match.start()) + 1
-                raise VendoringError(
-                    "Encountered import that cannot be transformed for a namespace.\n"
-                    f'File "{item}", line {line_number}\n'
-                    f"  {match.group(1)}\n"
-                    "\n"
-                    "You will need to add a patch, that adapts the code to avoid a "
-                    "`import dotted.name` style import here; since those cannot be "
-                    "transformed for importing via a namespace."
-                )
-
-            # Normal case "from a import b"
-            text = re.sub(
-                rf"^(\s*)from {lib}(\.|\s)",
-                rf"\1from {namespace}.{lib}\2",
-                text,
-                flags=re.MULTILINE,
-            )
-
-    item.write_text(text, encoding="utf-8")
+
+def _find_python_files(destination: Path) -> Iterator[Path]:
+    for dirpath, _, filenames in os.walk(destination, followlinks=True):
+        for filename in filenames:
+            if filename.endswith(".py"):
+                yield Path(dirpath, filename)
 
 
 def rewrite_imports(
@@ -115,27 +200,40 @@ def rewrite_imports(
     vendored_libs: List[str],
     additional_substitutions: List[Dict[str, str]],
 ) -> None:
-    for item in destination.iterdir():
-        if item.is_dir():
-            rewrite_imports(item, namespace, vendored_libs, additional_substitutions)
-        elif item.name.endswith(".py"):
-            rewrite_file_imports(
-                item, namespace, vendored_libs, additional_substitutions
-            )
+    files = list(_find_python_files(destination))
+    rewrite = functools.partial(
+        rewrite_file_imports,
+        namespace=namespace,
+        vendored_libs=vendored_libs,
+        additional_substitutions=additional_substitutions,
+    )
+
+    # Each file is rewritten independently, and the work is CPU-bound, so spread
+    # it across processes -- unless there's too little work to be worth it.
+    if len(files) < _PARALLEL_REWRITE_THRESHOLD:
+        for item in files:
+            rewrite(item)
+        return
+
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(rewrite, files, chunksize=16))
 
 
 def detect_vendored_libs(destination: Path, files_to_skip: List[str]) -> List[str]:
     retval = []
-    for item in destination.iterdir():
-        if item.is_dir():
-            retval.append(item.name)
-        elif item.name.endswith(".pyi"):  # generated stubs
-            continue
-        elif item.name not in files_to_skip:
-            if not item.name.endswith(".py"):
-                UI.warn(f"Got unexpected non-Python file: {item}")
+    skipped = set(files_to_skip)
+    with os.scandir(destination) as entries:
+        for entry in entries:
+            name = entry.name
+            if entry.is_dir():
+                retval.append(name)
+            elif name.endswith(".pyi"):  # generated stubs
                 continue
-            retval.append(item.name[:-3])
+            elif name not in skipped:
+                if not name.endswith(".py"):
+                    UI.warn(f"Got unexpected non-Python file: {destination / name}")
+                    continue
+                retval.append(name[:-3])
     return retval
 
 
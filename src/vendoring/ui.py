@@ -1,9 +1,10 @@
 """Maintains state and output of the user interface.
 """
 
+import threading
+import time
 import traceback
 from contextlib import contextmanager
-from itertools import cycle
 from textwrap import indent
 from typing import Iterator, List, Optional
 
@@ -14,12 +15,15 @@ from vendoring.errors import VendoringError
 
 
 class _UserInterface:
-    _spinner_frames = [
+    _spinner_frames = (
         ".",
         "o",
         "O",
         "o",
-    ]
+    )
+    # Minimum time between spinner frames (in seconds), so that lots of quickly
+    # logged messages don't turn into as many terminal writes.
+    _spinner_interval = 0.08
 
     def __init__(self) -> None:
         rich.traceback.install()
@@ -30,7 +34,10 @@ class _UserInterface:
         self._current_task: Optional[str] = None
         self._logged_messages: List[str] = []
 
-        self._spinner: Optional[Iterator[str]] = None
+        self._spinner_index = 0
+        self._spinner_drawn_at = float("-inf")
+        # Messages can come from worker threads (e.g. while fetching licenses).
+        self._lock = threading.Lock()
 
     def _log(self, text: str, nl: bool = True, erase: bool = False) -> None:
         if erase:
@@ -38,20 +45,49 @@ class _UserInterface:
             text += "\b" * len(text)
         _click.echo(text, nl=nl)
 
+    def _indent(self, text: str) -> str:
+        prefix = "  " * self._indentation
+        if not prefix:
+            return text
+        # Most messages are a single line, which needs no splitting and joining.
+        # (like textwrap.indent, lines that are only whitespace aren't indented)
+        if "\n" not in text:
+            return prefix + text if text and not text.isspace() else text
+        return indent(text, prefix)
+
     def warn(self, message: str) -> None:
         self.log(_click.style(f"WARN: {message}", fg="yellow"))
 
+    @property
+    def hides_messages(self) -> bool:
+        """Whether logged messages are hidden (shown only if the task fails)."""
+        return self._current_task is not None and not self.verbose
+
     def log(self, message: str) -> None:
-        message = indent(message, "  " * self._indentation)
+        with self._lock:
+            message = self._indent(message)
 
-        if self._current_task is not None and not self.verbose:
-            if self._spinner is None:
-                self._spinner = cycle(self._spinner_frames)
-            self._logged_messages.append(message)
-            self._log(next(self._spinner), nl=False, erase=True)
-            return
+            if self.hides_messages:
+                self._logged_messages.append(message)
+                self._spin()
+                return
+
+            self._log(message)
 
-        self._log(message)
+    def spin(self) -> None:
+        """Show progress on the spinner, without logging anything."""
+        with self._lock:
+            if self.hides_messages:
+                self._spin()
+
+    def _spin(self) -> None:
+        now = time.monotonic()
+        if now - self._spinner_drawn_at >= self._spinner_interval:
+            self._spinner_drawn_at = now
+            frames = self._spinner_frames
+            frame = frames[self._spinner_index % len(frames)]
+            self._spinner_index += 1
+            self._log(frame, nl=False, erase=True)
 
     @contextmanager
     def indent(self) -> Iterator[None]:
@@ -66,7 +102,7 @@ class _UserInterface:
         if self._current_task is not None:
             raise Exception("Only 1 task at a time.")
 
-        self._log(indent(f"{task}... ", "  " * self._indentation), nl=self.verbose)
+        self._log(self._indent(f"{task}... "), nl=self.verbose)
 
         self._current_task = task
         try:
@@ -80,7 +116,8 @@ class _UserInterface:
         finally:
             self._current_task = None
             self._logged_messages = []
-            self._spinner = None
+            self._spinner_index = 0
+            self._spinner_drawn_at = float("-inf")
 
     def _task_failed(self) -> None:
         if self.verbose:
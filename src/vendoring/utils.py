@@ -1,62 +1,219 @@
+import functools
 import os
 import re
 import shlex
 import shutil
+import stat
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple, Union
 
+from vendoring import __version__
 from vendoring.errors import VendoringError
 from vendoring.ui import UI
 
+if TYPE_CHECKING:
+    import requests
 
-def remove_all(items_to_cleanup: Iterable[Path], *, protected: List[Path]) -> None:
-    for item in items_to_cleanup:
-        if not item.exists():
-            continue
-        if item in protected:
+# How often to show progress, while waiting on a command that logs nothing.
+_SPIN_INTERVAL = 0.1
+
+
+def _remove_item(item: Path, is_dir: bool) -> None:
+    if is_dir:
+        shutil.rmtree(item)
+    else:
+        item.unlink()
+
+
+def remove_items(
+    items_to_cleanup: Iterable[Tuple[Path, bool]], *, protected: List[Path]
+) -> None:
+    """Remove existing items, given as (path, is a real directory) pairs.
+
+    The items must not be nested within each other (e.g. entries of a single
+    directory), since they are removed concurrently.
+    """
+    items = [
+        (item, is_dir) for item, is_dir in items_to_cleanup if item not in protected
+    ]
+
+    # Removing a tree is a long series of syscalls (which release the GIL), and
+    # the items are independent, so remove them concurrently.
+    if len(items) < 2:
+        for item, is_dir in items:
+            _remove_item(item, is_dir)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(32, len(items))) as executor:
+        list(executor.map(_remove_item, *zip(*items)))
+
+
+def _existing_items(items: Iterable[Path]) -> Iterator[Tuple[Path, bool]]:
+    for item in items:
+        try:
+            mode = os.lstat(item).st_mode
+        except FileNotFoundError:
             continue
-        if item.is_dir() and not item.is_symlink():
-            shutil.rmtree(item)
+        yield item, stat.S_ISDIR(mode)
+
+
+def remove_all(items_to_cleanup: Iterable[Path], *, protected: List[Path]) -> None:
+    # The items may be nested (e.g. from a recursive glob), so remove them one at
+    # a time, skipping the ones that went away along with an earlier item.
+    for item, is_dir in _existing_items(items_to_cleanup):
+        if item not in protected:
+            _remove_item(item, is_dir)
+
+
+_REGEX_SPECIAL_CHARACTERS = frozenset(".^$*+?{}[]\\|()")
+_REGEX_QUANTIFIERS = frozenset("*+?{")
+
+
+def _literal_prefix(compiled: "re.Pattern[str]") -> str:
+    """Find a string that everything matched by `compiled` (with .match) starts with.
+
+    This is conservative: it may be shorter than possible (down to "").
+    """
+    pattern = compiled.pattern
+    if compiled.flags & (re.IGNORECASE | re.VERBOSE):  # literals aren't literal
+        return ""
+    if "|" in pattern:  # each alternative could start differently
+        return ""
+
+    prefix = []
+    i = 1 if pattern.startswith("^") else 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            char = pattern[i + 1]  # an escaped special character
+            i += 2
+        elif char in _REGEX_SPECIAL_CHARACTERS:
+            break
         else:
-            item.unlink()
+            i += 1
+        if i < len(pattern) and pattern[i] in _REGEX_QUANTIFIERS:
+            break  # this character may not be there (or may be repeated)
+        prefix.append(char)
+    return "".join(prefix)
+
+
+def remove_matching_regexes(
+    path: Path, patterns: Iterable[Union[str, "re.Pattern[str]"]]
+) -> None:
+    """Remove everything within `path`, whose "/"-separated relative path matches.
+
+    Anything matching any of the patterns is removed, in a single walk of the
+    tree. The patterns can also be passed pre-compiled.
+    """
+    compiled = [re.compile(pattern) for pattern in patterns]
+    if not compiled:
+        return
+    matchers = [pattern.match for pattern in compiled]
+    # Used to skip directories that nothing within could match.
+    literal_prefixes = [_literal_prefix(pattern) for pattern in compiled]
+
+    def could_match_within(sub: str) -> bool:
+        return any(
+            sub.startswith(literal) or literal.startswith(sub)
+            for literal in literal_prefixes
+        )
 
+    def remove_matching(directory: str, prefix: str) -> None:
+        # Relative names are tracked as plain "/"-separated strings, so that
+        # entries which don't match don't cost any Path objects.
+        with os.scandir(directory) as entries:
+            items = list(entries)
+        for entry in items:
+            name = prefix + entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if any(match(name) for match in matchers):
+                if is_dir:
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+            elif is_dir and could_match_within(name + "/"):
+                remove_matching(entry.path, name + "/")
 
-def remove_matching_regex(path: Path, pattern: str) -> None:
-    compiled = re.compile(pattern)
-    for dirpath, dirnames, filenames in os.walk(path):
-        rel_dirpath = Path(os.path.relpath(dirpath, path))
-        # Delete matching folders
-        for dirname in dirnames:
-            if compiled.match((rel_dirpath / dirname).as_posix()):
-                dirnames.remove(dirname)
-                shutil.rmtree(os.path.join(dirpath, dirname))
-        # Delete matching files
-        for filename in filenames:
-            if compiled.match((rel_dirpath / filename).as_posix()):
-                os.remove(os.path.join(dirpath, filename))
+    remove_matching(os.fspath(path), "")
+
+
+def remove_matching_regex(path: Path, pattern: Union[str, "re.Pattern[str]"]) -> None:
+    remove_matching_regexes(path, [pattern])
+
+
+def _log_output(lines: Iterable[str]) -> None:
+    with UI.indent():
+        for line in lines:
+            line = line.rstrip()
+            if line:
+                UI.log(line)
 
 
-def run(command: List[str], *, working_directory: Optional[Path]) -> None:
+def run(
+    command: List[str], *, working_directory: Optional[Path], quiet: bool = False
+) -> None:
+    """Run `command`, logging its output.
+
+    With `quiet`, output that the UI would hide anyway (unless the task fails) is
+    only logged when the command fails, instead of line-by-line as it runs.
+    """
     cmd = " ".join(map(shlex.quote, command))
     UI.log(f"Running {cmd}")
-    p = subprocess.Popen(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        encoding="utf-8",
-        cwd=working_directory,
-    )
-    assert p.stdout  # make mypy happy
-    while True:
-        retcode = p.poll()
-        line = p.stdout.readline().rstrip()
-
-        if line:
-            with UI.indent():
-                UI.log(line)
 
-        if retcode is not None:
-            break
+    if quiet and UI.hides_messages:
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as output:
+            process = subprocess.Popen(
+                command,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+                cwd=working_directory,
+            )
+            # Nothing gets logged while the command runs, so keep the spinner going.
+            while True:
+                try:
+                    retcode = process.wait(timeout=_SPIN_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    UI.spin()
+            if retcode:
+                output.seek(0)
+                _log_output(output)
+    else:
+        p = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            encoding="utf-8",
+            cwd=working_directory,
+        )
+        assert p.stdout  # make mypy happy
+        # The pipe is buffered, so this reads the output in large chunks; the
+        # loop ends at EOF, after which the process only needs to be reaped.
+        _log_output(p.stdout)
+        retcode = p.wait()
+
     if retcode:
         raise VendoringError(f"Command exited with non-zero exit code: {retcode}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_session() -> "requests.Session":
+    """Get the HTTP session shared by all tasks, so that connections get reused."""
+    # Imported here, so that commands that don't use the network don't pay for it.
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    session.headers["User-Agent"] = f"vendoring/{__version__}"
+    return session
+
+
+def close_session() -> None:
+    """Close the shared HTTP session, if there is one; later calls get a new one."""
+    if get_session.cache_info().currsize:
+        get_session().close()
+        get_session.cache_clear()
@@ -47,7 +47,8 @@ class TestDetermineItemsToRemove:
         locations = determine_items_to_remove(throwaway, files_to_skip=skip)
 
         got = []
-        for item in locations:
+        for item, is_dir in locations:
+            assert is_dir == item.is_dir()
             got.append(str(item.relative_to(throwaway)))
 
         assert sorted(got) == sorted(expected)
@@ -65,7 +66,7 @@ class TestCleanupExistingVendored:
         )
         determine_mock.return_value = our_unique_blob
 
-        remove_mock = mocker.patch("vendoring.tasks.cleanup.remove_all")
+        remove_mock = mocker.patch("vendoring.tasks.cleanup.remove_items")
 
         # Create a mock to pass in
         config_mock = mocker.Mock()
@@ -90,3 +91,22 @@ class TestCleanupExistingVendored:
         cleanup_existing_vendored(config_mock)
 
         assert sorted(throwaway.iterdir()) == [throwaway / "foo.txt"]
+
+    def test_symlinked_directory(
+        self,
+        mocker: MockerFixture,
+        throwaway: Path,
+        tmp_path_factory: pytest.TempPathFactory,
+    ) -> None:
+        target = tmp_path_factory.mktemp("target")
+        (target / "keep.txt").touch()
+        (throwaway / "link").symlink_to(target, target_is_directory=True)
+
+        config_mock = mocker.Mock()
+        config_mock.destination = throwaway
+        config_mock.protected_files = ["foo.txt"]
+
+        cleanup_existing_vendored(config_mock)
+
+        assert sorted(throwaway.iterdir()) == [throwaway / "foo.txt"]
+        assert (target / "keep.txt").exists()
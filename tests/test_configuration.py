@@ -0,0 +1,91 @@
+"""Unit tests for `vendoring.configuration`"""
+
+import os
+import textwrap
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from vendoring import configuration
+from vendoring.configuration import load_configuration
+from vendoring.errors import ConfigurationError
+
+_PYPROJECT = textwrap.dedent(
+    """\
+        [tool.vendoring]
+        destination = "vendored/"
+        requirements = "vendored/vendor.txt"
+        namespace = "vendored"
+    """
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> Iterator[None]:
+    configuration._CONFIG_CACHE.clear()
+    yield
+    configuration._CONFIG_CACHE.clear()
+
+
+class TestLoadConfiguration:
+    def test_basic(self, tmp_path: Path) -> None:
+        (tmp_path / "pyproject.toml").write_text(_PYPROJECT)
+
+        config = load_configuration(tmp_path)
+
+        assert config.base_directory == tmp_path.resolve()
+        assert config.destination == Path("vendored")
+        assert config.namespace == "vendored"
+        assert config.requirements == Path("vendored/vendor.txt")
+        assert config.license_download_from_pypi is False
+
+    def test_download_from_pypi(self, tmp_path: Path) -> None:
+        (tmp_path / "pyproject.toml").write_text(
+            _PYPROJECT + "\n[tool.vendoring.license]\ndownload-from-pypi = true\n"
+        )
+
+        config = load_configuration(tmp_path)
+
+        assert config.license_download_from_pypi is True
+
+    def test_resolves_base_directory(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        (tmp_path / "pyproject.toml").write_text(_PYPROJECT)
+        monkeypatch.chdir(tmp_path)
+
+        config = load_configuration(Path())
+
+        assert config.base_directory == tmp_path.resolve()
+
+    def test_missing_file(self, tmp_path: Path) -> None:
+        with pytest.raises(ConfigurationError):
+            load_configuration(tmp_path)
+
+    def test_reuses_configuration_on_repeated_loads(self, tmp_path: Path) -> None:
+        (tmp_path / "pyproject.toml").write_text(_PYPROJECT)
+
+        first = load_configuration(tmp_path)
+        second = load_configuration(tmp_path)
+
+        assert first is second
+
+    def test_reloads_configuration_on_change(self, tmp_path: Path) -> None:
+        file = tmp_path / "pyproject.toml"
+        file.write_text(_PYPROJECT)
+        first = load_configuration(tmp_path)
+
+        file.write_text(_PYPROJECT.replace('"vendored"', '"other"'))
+        st = os.stat(file)
+        os.utime(file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        second = load_configuration(tmp_path)
+
+        assert first is not second
+        assert second.namespace == "other"
+
+    def test_invalid_configuration(self, tmp_path: Path) -> None:
+        (tmp_path / "pyproject.toml").write_text(_PYPROJECT + "unknown = 1\n")
+
+        with pytest.raises(ConfigurationError, match="unknown"):
+            load_configuration(tmp_path)
@@ -0,0 +1,96 @@
+"""Unit tests for `vendoring.interactive`"""
+
+from pathlib import Path
+from typing import Dict
+from unittest import mock
+from unittest.mock import Mock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from vendoring.interactive import InteractionState, interactive_updates
+
+
+class TestInteractionState:
+    def test_update(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        requirements = tmp_path / "vendor.txt"
+        requirements.write_text("six==1.16.0\npackaging==21.3  # comment\n")
+
+        config_mock = mocker.Mock()
+        config_mock.base_directory = tmp_path
+        config_mock.requirements = requirements
+
+        state = InteractionState(config_mock)
+        assert state.resuming_from is None
+
+        state.update("packaging", "22.0")
+
+        assert requirements.read_text() == "six==1.16.0\npackaging==22.0  # comment\n"
+        assert state.packages == (("six", "1.16.0"), ("packaging", "22.0"))
+
+        resumed = InteractionState(config_mock)
+        assert resumed.resuming_from is not None
+        assert resumed.resuming_from.name == "packaging"
+
+        resumed.cleanup()
+        assert not (tmp_path / ".vendoring_cache").exists()
+
+
+def _resume_from_packaging(mocker: MockerFixture, tmp_path: Path) -> Mock:
+    requirements = tmp_path / "vendor.txt"
+    requirements.write_text("six==1.16.0\npackaging==21.3\nrich==13.0.0\n")
+    state_file = (
+        tmp_path / ".vendoring_cache" / "do-not-commit.interactive.current-package"
+    )
+    state_file.parent.mkdir()
+    state_file.write_text("packaging")
+
+    config_mock = mocker.Mock()
+    config_mock.base_directory = tmp_path
+    config_mock.requirements = requirements
+    return config_mock
+
+
+class TestInteractiveUpdates:
+    @pytest.fixture(autouse=True)
+    def latest(self, mocker: MockerFixture) -> Dict[str, str]:
+        latest = {"six": "1.16.0", "packaging": "21.3", "rich": "13.0.0"}
+        self.determine_latest_releases = mocker.patch(
+            "vendoring.interactive.determine_latest_releases",
+            side_effect=lambda names: {name: latest[name] for name in names},
+        )
+        self.do_one_update = mocker.patch("vendoring.interactive.do_one_update")
+        return latest
+
+    def test_resume_prefetches_remaining_packages(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        config_mock = _resume_from_packaging(mocker, tmp_path)
+
+        interactive_updates(config_mock, skip=[], only=[], from_start=False)
+
+        assert self.determine_latest_releases.call_args_list == [
+            mock.call(["rich"]),
+            mock.call(["six"]),
+            mock.call(["packaging"]),
+        ]
+        self.do_one_update.assert_called_once_with(
+            config_mock, name="packaging", version="21.3"
+        )
+
+    def test_resume_with_different_filters(
+        self, mocker: MockerFixture, tmp_path: Path, latest: Dict[str, str]
+    ) -> None:
+        # The interrupted run was with `--skip six`, so six was never processed.
+        latest["six"] = "1.17.0"
+        config_mock = _resume_from_packaging(mocker, tmp_path)
+
+        interactive_updates(config_mock, skip=[], only=[], from_start=False)
+
+        assert self.do_one_update.call_args_list == [
+            mock.call(config_mock, name="packaging", version="21.3"),
+            mock.call(config_mock, name="six", version="1.17.0"),
+        ]
+        assert (tmp_path / "vendor.txt").read_text() == (
+            "six==1.17.0\npackaging==21.3\nrich==13.0.0\n"
+        )
@@ -0,0 +1,351 @@
+"""Unit tests for `vendoring.tasks.license`"""
+
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+from pytest_mock import MockerFixture
+
+from vendoring.errors import VendoringError
+from vendoring.tasks.license import (
+    LicenseExtractor,
+    _get_library_name_from_artifact_name,
+    _select_distribution,
+    download_distributions,
+)
+from vendoring.tasks.update import PinnedPackageInfo
+
+_PACKAGE = PinnedPackageInfo(name="sample", version="1.0", prefix="", suffix="")
+
+_ARCHIVE_CONTENTS = {
+    "sample-1.0/setup.py": b"",
+    "sample-1.0/sample/__init__.py": b"",
+    "sample-1.0/tests/LICENSE": b"not this one",
+    "sample-1.0/LICENSE": b"license text",
+}
+
+
+def _write_sdist(path: Path, contents: Dict[str, bytes] = _ARCHIVE_CONTENTS) -> None:
+    with tarfile.open(path, "w:gz") as tarball:
+        for name, data in contents.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tarball.addfile(info, io.BytesIO(data))
+
+
+def _write_wheel(path: Path, contents: Dict[str, bytes] = _ARCHIVE_CONTENTS) -> None:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in contents.items():
+            archive.writestr(name, data)
+
+
+def _extractor(
+    destination: Path, license_directories: Optional[Dict[str, str]] = None
+) -> LicenseExtractor:
+    return LicenseExtractor(
+        destination=destination,
+        license_directories=license_directories or {},
+        license_fallback_urls={},
+    )
+
+
+def _file(packagetype: str, filename: str) -> Dict[str, str]:
+    return {
+        "packagetype": packagetype,
+        "filename": filename,
+        "url": f"https://files.example.com/{filename}",
+    }
+
+
+@pytest.mark.parametrize(
+    ["artifact_name", "expected"],
+    [
+        ("six-1.15.0-py2.py3-none-any.whl", "six"),
+        ("typing_extensions-4.0.0.tar.gz", "typing_extensions"),
+        ("backports.functools-lru-cache-1.6.4.tar.gz", "backports.functools-lru-cache"),
+        ("3to2-1.1.1.zip", ""),
+        ("no-version", "no-version"),
+    ],
+)
+def test_get_library_name_from_artifact_name(artifact_name: str, expected: str) -> None:
+    assert _get_library_name_from_artifact_name(artifact_name) == expected
+
+
+class TestSelectDistribution:
+    @pytest.mark.parametrize(
+        ["files", "expected"],
+        [
+            (
+                [
+                    _file("sdist", "sample-1.0.tar.gz"),
+                    _file("bdist_wheel", "sample-1.0-py3-none-any.whl"),
+                ],
+                "sample-1.0-py3-none-any.whl",
+            ),
+            (
+                [
+                    _file("bdist_wheel", "sample-1.0-cp38-cp38-win32.whl"),
+                    _file("sdist", "sample-1.0.tar.gz"),
+                ],
+                "sample-1.0.tar.gz",
+            ),
+            (
+                [
+                    _file("bdist_wheel", "sample-1.0-py2-none-any.whl"),
+                    _file("bdist_wheel", "sample-1.0-py2.py3-none-any.whl"),
+                ],
+                "sample-1.0-py2.py3-none-any.whl",
+            ),
+            (
+                [
+                    _file("bdist_wheel", "sample-1.0-py2-none-any.whl"),
+                    _file("sdist", "sample-1.0.tar.gz"),
+                ],
+                "sample-1.0.tar.gz",
+            ),
+        ],
+    )
+    def test_selection(
+        self, mocker: MockerFixture, files: List[Dict[str, Any]], expected: str
+    ) -> None:
+        session = mocker.Mock()
+        session.get.return_value.json.return_value = {"urls": files}
+
+        url, filename = _select_distribution(session, _PACKAGE)
+
+        session.get.assert_called_with(
+            "https://pypi.org/pypi/sample/1.0/json", timeout=30
+        )
+        assert url == f"https://files.example.com/{expected}"
+        assert filename == expected
+
+    def test_no_suitable_distribution(self, mocker: MockerFixture) -> None:
+        session = mocker.Mock()
+        session.get.return_value.json.return_value = {
+            "urls": [_file("bdist_wheel", "sample-1.0-cp38-cp38-win32.whl")]
+        }
+
+        with pytest.raises(VendoringError):
+            _select_distribution(session, _PACKAGE)
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            ValueError("Expecting value"),
+            {},
+            {"urls": [{"filename": "sample-1.0.tar.gz"}]},
+            {"urls": None},
+        ],
+    )
+    def test_unexpected_response(self, mocker: MockerFixture, payload: Any) -> None:
+        session = mocker.Mock()
+        if isinstance(payload, Exception):
+            session.get.return_value.json.side_effect = payload
+        else:
+            session.get.return_value.json.return_value = payload
+
+        with pytest.raises(VendoringError):
+            _select_distribution(session, _PACKAGE)
+
+
+class TestDownloadDistributions:
+    @pytest.mark.parametrize(
+        ["requirements", "from_pypi"],
+        [
+            ("sample==1.0\n", False),
+            ("sample\n", True),
+            ('sample==1.0; python_version < "3.8"\n', True),
+            ("sample==1.0 --hash=sha256:0123\n", True),
+        ],
+    )
+    def test_uses_pip(
+        self, tmp_path: Path, mocker: MockerFixture, requirements: str, from_pypi: bool
+    ) -> None:
+        (tmp_path / "vendor.txt").write_text(requirements)
+        pip_download = mocker.patch(
+            "vendoring.tasks.license._pip_download_distributions"
+        )
+        direct_download = mocker.patch("vendoring.tasks.license._download_distribution")
+
+        download_distributions(
+            tmp_path / "downloads", tmp_path / "vendor.txt", from_pypi=from_pypi
+        )
+
+        pip_download.assert_called_once_with(
+            tmp_path / "downloads", tmp_path / "vendor.txt"
+        )
+        direct_download.assert_not_called()
+
+    def test_downloads_from_pypi(self, tmp_path: Path, mocker: MockerFixture) -> None:
+        (tmp_path / "vendor.txt").write_text("sample==1.0  # comment\n")
+        pip_download = mocker.patch(
+            "vendoring.tasks.license._pip_download_distributions"
+        )
+        direct_download = mocker.patch("vendoring.tasks.license._download_distribution")
+
+        download_distributions(
+            tmp_path / "downloads", tmp_path / "vendor.txt", from_pypi=True
+        )
+
+        pip_download.assert_not_called()
+        assert direct_download.call_count == 1
+
+    def test_falls_back_to_pip(self, tmp_path: Path, mocker: MockerFixture) -> None:
+        (tmp_path / "vendor.txt").write_text("sample==1.0  # comment\n")
+        pip_download = mocker.patch(
+            "vendoring.tasks.license._pip_download_distributions"
+        )
+        mocker.patch(
+            "vendoring.tasks.license._download_distribution",
+            side_effect=VendoringError("Could not download sample==1.0"),
+        )
+
+        download_distributions(
+            tmp_path / "downloads", tmp_path / "vendor.txt", from_pypi=True
+        )
+
+        pip_download.assert_called_once_with(
+            tmp_path / "downloads", tmp_path / "vendor.txt"
+        )
+
+
+class TestLicenseExtractor:
+    @pytest.mark.parametrize(
+        ["filename", "writer"],
+        [
+            ("sample-1.0.tar.gz", _write_sdist),
+            ("sample-1.0-py3-none-any.whl", _write_wheel),
+        ],
+    )
+    def test_extract_license_from_artifact(
+        self, tmp_path: Path, filename: str, writer: Any
+    ) -> None:
+        artifact = tmp_path / filename
+        writer(artifact)
+        destination = tmp_path / "vendored"
+        (destination / "sample").mkdir(parents=True)
+
+        _extractor(destination).extract_license_from_artifact(artifact)
+
+        assert (destination / "sample" / "LICENSE").read_bytes() == b"license text"
+
+    def test_extracts_every_license_from_sdist(self, tmp_path: Path) -> None:
+        artifact = tmp_path / "sample-1.0.tar.gz"
+        names = ["LICENSE.APACHE", "setup.py", "LICENSE.BSD"]
+        _write_sdist(artifact, {f"sample-1.0/{name}": name.encode() for name in names})
+        destination = tmp_path / "vendored"
+        (destination / "sample").mkdir(parents=True)
+
+        _extractor(destination).extract_license_from_artifact(artifact)
+
+        assert sorted(p.name for p in (destination / "sample").iterdir()) == [
+            "LICENSE.APACHE",
+            "LICENSE.BSD",
+        ]
+
+    def test_extracts_linked_license_from_sdist(self, tmp_path: Path) -> None:
+        artifact = tmp_path / "sample-1.0.tar.gz"
+        with tarfile.open(artifact, "w:gz") as tarball:
+            info = tarfile.TarInfo("sample-1.0/LICENSE.txt")
+            info.size = len(b"license text")
+            tarball.addfile(info, io.BytesIO(b"license text"))
+            link = tarfile.TarInfo("sample-1.0/LICENSE")
+            link.type = tarfile.SYMTYPE
+            link.linkname = "LICENSE.txt"
+            tarball.addfile(link)
+        destination = tmp_path / "vendored"
+        (destination / "sample").mkdir(parents=True)
+
+        _extractor(destination).extract_license_from_artifact(artifact)
+
+        assert (destination / "sample" / "LICENSE").read_bytes() == b"license text"
+        assert (destination / "sample" / "LICENSE.txt").read_bytes() == (
+            b"license text"
+        )
+
+    @pytest.mark.parametrize(
+        "names",
+        [
+            ["sample-1.0/docs/LICENSE", "sample-1.0/LICENSE"],
+            ["sample-1.0/LICENSE", "sample-1.0/docs/LICENSE"],
+        ],
+    )
+    def test_least_nested_license_wins(self, tmp_path: Path, names: List[str]) -> None:
+        artifact = tmp_path / "sample-1.0.tar.gz"
+        _write_sdist(artifact, {name: name.encode() for name in names})
+        destination = tmp_path / "vendored"
+        (destination / "sample").mkdir(parents=True)
+
+        _extractor(destination).extract_license_from_artifact(artifact)
+
+        assert (destination / "sample" / "LICENSE").read_bytes() == (
+            b"sample-1.0/LICENSE"
+        )
+
+    def test_skips_directory_entries(self, tmp_path: Path) -> None:
+        artifact = tmp_path / "sample-1.0.zip"
+        with zipfile.ZipFile(artifact, "w") as archive:
+            archive.writestr("sample-1.0/LICENSES/", b"")
+            archive.writestr("sample-1.0/LICENSES/MIT.txt", b"license text")
+        destination = tmp_path / "vendored"
+        (destination / "sample").mkdir(parents=True)
+
+        _extractor(destination).extract_license_from_artifact(artifact)
+
+        assert (destination / "sample" / "MIT.txt").read_bytes() == b"license text"
+
+    def test_skips_directory_members_of_sdist(self, tmp_path: Path) -> None:
+        artifact = tmp_path / "sample-1.0.tar.gz"
+        with tarfile.open(artifact, "w:gz") as tarball:
+            directory = tarfile.TarInfo("sample-1.0/LICENSES")
+            directory.type = tarfile.DIRTYPE
+            tarball.addfile(directory)
+            info = tarfile.TarInfo("sample-1.0/LICENSES/MIT.txt")
+            info.size = len(b"license text")
+            tarball.addfile(info, io.BytesIO(b"license text"))
+        destination = tmp_path / "vendored"
+        (destination / "sample").mkdir(parents=True)
+
+        _extractor(destination).extract_license_from_artifact(artifact)
+
+        assert (destination / "sample" / "MIT.txt").read_bytes() == b"license text"
+
+    def test_wheel_licenses_come_from_dist_info(self, tmp_path: Path) -> None:
+        artifact = tmp_path / "sample-1.0-py3-none-any.whl"
+        _write_wheel(
+            artifact,
+            {
+                "sample/_vendored/LICENSE": b"vendored license",
+                "sample-1.0.dist-info/LICENSE": b"license text",
+            },
+        )
+        destination = tmp_path / "vendored"
+        (destination / "sample").mkdir(parents=True)
+
+        _extractor(destination).extract_license_from_artifact(artifact)
+
+        assert (destination / "sample" / "LICENSE").read_bytes() == b"license text"
+
+    @pytest.mark.parametrize(
+        ["library", "expected"],
+        [
+            ("sample", "sample/LICENSE"),
+            ("Lowercase", "lowercase/LICENSE"),
+            ("renamed", "other/LICENSE"),
+            ("module", "module.LICENSE"),
+        ],
+    )
+    def test_get_license_destination(
+        self, tmp_path: Path, library: str, expected: str
+    ) -> None:
+        (tmp_path / "sample").mkdir()
+        (tmp_path / "lowercase").mkdir()
+
+        extractor = _extractor(tmp_path, {"renamed": "other"})
+
+        assert extractor.get_license_destination(library, "LICENSE") == (
+            tmp_path / expected
+        )
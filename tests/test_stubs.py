@@ -0,0 +1,39 @@
+"""Unit tests for `vendoring.tasks.stubs`"""
+
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from vendoring.tasks.stubs import generate_stubs
+
+
+class TestGenerateStubs:
+    def test_nested_stubs(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        (tmp_path / "six").mkdir()
+        (tmp_path / "pkg").mkdir()
+
+        config_mock = mocker.Mock()
+        config_mock.destination = tmp_path
+        config_mock.typing_stubs = {
+            "pkg": ["pkg.__init__", "pkg.sub.deep.__init__", "pkg.sub.deep.mod"]
+        }
+
+        generate_stubs(config_mock, ["six", "pkg"])
+
+        assert (tmp_path / "six.pyi").read_text() == "from six import *"
+        assert (tmp_path / "pkg" / "__init__.pyi").read_text() == "from pkg import *"
+        deep = tmp_path / "pkg" / "sub" / "deep"
+        assert (deep / "__init__.pyi").read_text() == "from pkg.sub.deep import *"
+        assert (deep / "mod.pyi").read_text() == "from pkg.sub.deep.mod import *"
+
+    def test_skips_typed_libraries(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        (tmp_path / "typed").mkdir()
+        (tmp_path / "typed" / "py.typed").touch()
+
+        config_mock = mocker.Mock()
+        config_mock.destination = tmp_path
+        config_mock.typing_stubs = {}
+
+        generate_stubs(config_mock, ["typed"])
+
+        assert not (tmp_path / "typed.pyi").exists()
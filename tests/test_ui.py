@@ -1,4 +1,4 @@
-from typing import Any, Dict, Iterator, Optional
+from typing import Any, Dict, Optional
 from unittest import mock
 
 import pytest
@@ -8,15 +8,20 @@ from pytest_mock import MockerFixture
 from vendoring.errors import VendoringError
 from vendoring.ui import _UserInterface
 
+_DONE = style("Done!", fg="green")
+_WARN_BLAH = style("WARN: blah", fg="yellow")
+_RED_YAY = style("Yay!", fg="red")
+
 
 # --------------------------------------------------------------------------------------
 # Fixtures
 # --------------------------------------------------------------------------------------
 @pytest.fixture
-def ui() -> Iterator[_UserInterface]:
+def ui() -> _UserInterface:
     retval = _UserInterface()
-    with mock.patch.object(retval, "_log"):
-        yield retval
+    # A fresh instance per test, so there's no need to undo this afterwards.
+    retval._log = mock.MagicMock()  # type: ignore[method-assign]
+    return retval
 
 
 @pytest.fixture
@@ -75,6 +80,22 @@ def test_shows_basic_log(ui: _UserInterface) -> None:
     ui._log.assert_any_call("blah")  # type: ignore[attr-defined]
 
 
+@pytest.mark.parametrize(
+    ["message", "expected"],
+    [
+        ("blah", "    blah"),
+        ("", ""),
+        ("  ", "  "),
+        ("one\n\ntwo", "    one\n\n    two"),
+    ],
+)
+def test_log_indents_messages(ui: _UserInterface, message: str, expected: str) -> None:
+    with ui.indent(), ui.indent():
+        ui.log(message)
+
+    ui._log.assert_called_once_with(expected)  # type: ignore[attr-defined]
+
+
 def test_shows_basic_log_when_verbose(ui: _UserInterface, verbose: None) -> None:
     ui.log("blah")
     ui._log.assert_any_call("blah")  # type: ignore[attr-defined]
@@ -85,7 +106,7 @@ def test_shows_basic_warn(ui: _UserInterface, verbosity: bool) -> None:
     ui.verbose = verbosity
     ui.warn("blah")
 
-    ui._log.assert_any_call(style("WARN: blah", fg="yellow"))  # type: ignore[attr-defined]
+    ui._log.assert_any_call(_WARN_BLAH)  # type: ignore[attr-defined]
 
 
 def test_shows_task_log_shown_when_verbose(ui: _UserInterface, verbose: None) -> None:
@@ -113,7 +134,11 @@ def test_works_when_no_ui(ui: _UserInterface) -> None:
     ui._log.assert_any_call("Task Name... ", nl=False)  # type: ignore[attr-defined]
 
 
-def test_task_shows_spinner_when_silent(ui: _UserInterface) -> None:
+def test_task_shows_spinner_when_silent(
+    ui: _UserInterface, mocker: MockerFixture
+) -> None:
+    mocker.patch("vendoring.ui.time.monotonic", side_effect=[0.0, 0.1, 0.2])
+
     with ui.task("Task Name"):
         ui.log("blah")
         ui.log("foo")
@@ -124,10 +149,55 @@ def test_task_shows_spinner_when_silent(ui: _UserInterface) -> None:
         mock.call(ui._spinner_frames[0], nl=False, erase=True),
         mock.call(ui._spinner_frames[1], nl=False, erase=True),
         mock.call(ui._spinner_frames[2], nl=False, erase=True),
-        mock.call(style("Done!", fg="green")),
+        mock.call(_DONE),
+    ]
+
+
+def test_task_spinner_is_throttled(ui: _UserInterface, mocker: MockerFixture) -> None:
+    mocker.patch("vendoring.ui.time.monotonic", side_effect=[0.0, 0.01, 0.05, 0.1])
+
+    with ui.task("Task Name"):
+        ui.log("blah")
+        ui.log("foo")
+        ui.log("boo")
+        ui.log("bar")
+
+    assert ui._log.call_args_list == [  # type: ignore[attr-defined]
+        mock.call("Task Name... ", nl=False),
+        mock.call(ui._spinner_frames[0], nl=False, erase=True),
+        mock.call(ui._spinner_frames[1], nl=False, erase=True),
+        mock.call(_DONE),
     ]
 
 
+def test_spin_shows_spinner_without_logging(
+    ui: _UserInterface, mocker: MockerFixture
+) -> None:
+    mocker.patch("vendoring.ui.time.monotonic", side_effect=[0.0, 0.1])
+
+    ui.spin()  # outside of a task, there's no spinner
+    with ui.task("Task Name"):
+        ui.spin()
+        ui.spin()
+        assert ui._logged_messages == []
+
+    assert ui._log.call_args_list == [  # type: ignore[attr-defined]
+        mock.call("Task Name... ", nl=False),
+        mock.call(ui._spinner_frames[0], nl=False, erase=True),
+        mock.call(ui._spinner_frames[1], nl=False, erase=True),
+        mock.call(_DONE),
+    ]
+
+
+def test_hides_messages_only_in_silent_tasks(ui: _UserInterface) -> None:
+    assert not ui.hides_messages
+    with ui.task("Task Name"):
+        assert ui.hides_messages
+
+        ui.verbose = True
+        assert not ui.hides_messages
+
+
 def test_nested_tasks_not_allowed(ui: _UserInterface) -> None:
     with pytest.raises(Exception, match="Only 1 task at a time."):
         with ui.task("First"):
@@ -142,7 +212,8 @@ def test_show_error(ui: _UserInterface) -> None:
         ui.show_error(e)
 
     assert ui._log.call_args_list == [  # type: ignore[attr-defined]
-        mock.call("  " + style("Yay!", fg="red")),
+        mock.call("Encountered an error:"),
+        mock.call("  " + _RED_YAY),
     ]
 
 
@@ -152,10 +223,11 @@ def test_show_error_verbose(ui: _UserInterface, verbose: None) -> None:
     except Exception as e:
         ui.show_error(e)
 
-    assert ui._log.call_args_list == [  # type: ignore[attr-defined]
-        # XXX: This contains the entire traceback. We should check this but I'm tired.
-        mock.call(mock.ANY),
-    ]
+    first, second = ui._log.call_args_list  # type: ignore[attr-defined]
+    assert first == mock.call("Encountered an error:")
+    # The entire traceback, rather than just the message.
+    assert "Traceback (most recent call last):" in second.args[0]
+    assert "Exception: Yay!" in second.args[0]
 
 
 def test_task_failure(ui: _UserInterface) -> None:
@@ -172,12 +244,12 @@ def test_task_failure(ui: _UserInterface) -> None:
 
     assert ui._log.call_args_list == [  # type: ignore[attr-defined]
         mock.call("Task Name... ", nl=False),
-        mock.call("◴", nl=False, erase=True),
+        mock.call(ui._spinner_frames[0], nl=False, erase=True),
         mock.call(" "),
         mock.call("  Houston, there's a problem!"),
         mock.call("Another Task... ", nl=False),
-        mock.call("◴", nl=False, erase=True),
-        mock.call(style("Done!", fg="green")),
+        mock.call(ui._spinner_frames[0], nl=False, erase=True),
+        mock.call(_DONE),
     ]
 
 
@@ -198,5 +270,5 @@ def test_task_failure_verbose(ui: _UserInterface, verbose: None) -> None:
         mock.call("  Houston, there's a problem!"),
         mock.call("Another Task... ", nl=True),
         mock.call("  Works as expected"),
-        mock.call("  " + style("Done!", fg="green")),
+        mock.call("  " + _DONE),
     ]
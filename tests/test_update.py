@@ -0,0 +1,111 @@
+"""Unit tests for `vendoring.tasks.update`"""
+
+import os
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from pytest_mock import MockerFixture
+
+from vendoring.errors import RequirementsError
+from vendoring.tasks.update import parse_pinned_packages, update_requirements
+
+
+class TestParsePinnedPackages:
+    def test_basic(self, tmp_path: Path) -> None:
+        path = tmp_path / "vendor.txt"
+        path.write_text("six==1.16.0\n  packaging == 21.3  # comment\n")
+
+        packages = parse_pinned_packages(path)
+
+        assert [(p.name, p.version) for p in packages] == [
+            ("six", "1.16.0"),
+            ("packaging", "21.3"),
+        ]
+        assert [str(p) for p in packages] == [
+            "six==1.16.0",
+            "  packaging==21.3  # comment",
+        ]
+
+    def test_unpinned_requirement(self, tmp_path: Path) -> None:
+        path = tmp_path / "vendor.txt"
+        path.write_text("six==1.16.0\npackaging\n# comment\nsix==not-a-version\n")
+
+        with pytest.raises(RequirementsError) as exc_info:
+            parse_pinned_packages(path)
+
+        assert exc_info.value.args[0] == [
+            (2, "packaging"),
+            (3, "# comment"),
+            (4, "six==not-a-version"),
+        ]
+
+    def test_returns_fresh_objects(self, tmp_path: Path) -> None:
+        path = tmp_path / "vendor.txt"
+        path.write_text("six==1.16.0\n")
+
+        first = parse_pinned_packages(path)
+        first[0].version = "2.0.0"
+        second = parse_pinned_packages(path)
+
+        assert second[0].version == "1.16.0"
+
+    def test_reparses_on_change(self, tmp_path: Path) -> None:
+        path = tmp_path / "vendor.txt"
+        path.write_text("six==1.16.0\n")
+        parse_pinned_packages(path)
+
+        path.write_text("six==1.17.0\n")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        assert parse_pinned_packages(path)[0].version == "1.17.0"
+
+    def test_relative_paths_in_different_directories(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        for directory, version in [("one", "1.16.0"), ("two", "1.17.0")]:
+            (tmp_path / directory).mkdir()
+            path = tmp_path / directory / "vendor.txt"
+            path.write_text(f"six=={version}\n")
+            os.utime(path, ns=(0, 0))
+
+        monkeypatch.chdir(tmp_path / "one")
+        assert parse_pinned_packages(Path("vendor.txt"))[0].version == "1.16.0"
+        monkeypatch.chdir(tmp_path / "two")
+        assert parse_pinned_packages(Path("vendor.txt"))[0].version == "1.17.0"
+
+
+class TestUpdateRequirements:
+    @pytest.mark.parametrize(
+        ["package", "expected"],
+        [
+            (None, "six==1.17.0\npackaging==22.0  # comment\n"),
+            ("six", "six==1.17.0\npackaging==21.3  # comment\n"),
+        ],
+    )
+    def test_updates(
+        self,
+        mocker: MockerFixture,
+        tmp_path: Path,
+        package: Optional[str],
+        expected: str,
+    ) -> None:
+        requirements = tmp_path / "vendor.txt"
+        requirements.write_text("six==1.16.0\npackaging==21.3  # comment\n")
+        latest = {"six": "1.17.0", "packaging": "22.0"}
+        session = mocker.patch("vendoring.tasks.update.get_session").return_value
+        fetch_mock = mocker.patch(
+            "vendoring.tasks.update.fetch_latest_release",
+            side_effect=lambda _, name: latest[name],
+        )
+
+        config_mock = mocker.Mock()
+        config_mock.base_directory = tmp_path
+        config_mock.requirements = Path("vendor.txt")
+
+        update_requirements(config_mock, package)
+
+        assert requirements.read_text() == expected
+        assert fetch_mock.call_count == (1 if package else 2)
+        assert {c.args[0] for c in fetch_mock.call_args_list} == {session}
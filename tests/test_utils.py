@@ -0,0 +1,243 @@
+"""Unit tests for `vendoring.utils`"""
+
+import os
+import re
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from vendoring.errors import VendoringError
+from vendoring.utils import (
+    _literal_prefix,
+    close_session,
+    get_session,
+    remove_all,
+    remove_items,
+    remove_matching_regex,
+    remove_matching_regexes,
+    run,
+)
+
+
+def _remaining(path: Path) -> List[str]:
+    return sorted(p.relative_to(path).as_posix() for p in path.rglob("*"))
+
+
+@pytest.mark.parametrize(
+    ["pattern", "expected"],
+    [
+        ("^six/tests", "six/tests"),
+        ("six/tests", "six/tests"),
+        (r"^six\.py$", "six.py"),
+        ("^six/[^/]+/tests", "six/"),
+        ("^six/tests?/", "six/test"),
+        ("^six/tests{1,2}/", "six/test"),
+        ("^six|^seven", ""),
+        (r"^\w+/tests", ""),
+        ("(?i)^six", ""),
+    ],
+)
+def test_literal_prefix(pattern: str, expected: str) -> None:
+    assert _literal_prefix(re.compile(pattern)) == expected
+
+
+def test_literal_prefix_with_flags() -> None:
+    assert _literal_prefix(re.compile("^six", re.IGNORECASE)) == ""
+
+
+class TestRemoveItems:
+    def test_basic(self, tmp_path: Path) -> None:
+        for name in ["a/a.py", "b/b.py", "c/c.py", "d.py", "e.py"]:
+            (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / name).touch()
+
+        remove_items(
+            [
+                (tmp_path / "a", True),
+                (tmp_path / "b", True),
+                (tmp_path / "c", True),
+                (tmp_path / "d.py", False),
+                (tmp_path / "e.py", False),
+            ],
+            protected=[tmp_path / "c", tmp_path / "e.py"],
+        )
+
+        assert _remaining(tmp_path) == ["c", "c/c.py", "e.py"]
+
+    def test_errors_are_propagated(self, tmp_path: Path) -> None:
+        (tmp_path / "a").mkdir()
+
+        with pytest.raises(FileNotFoundError):
+            remove_items(
+                [(tmp_path / "a", True), (tmp_path / "missing", False)],
+                protected=[],
+            )
+
+
+class TestRemoveAll:
+    def test_basic(self, tmp_path: Path) -> None:
+        (tmp_path / "package").mkdir()
+        (tmp_path / "package" / "module.py").touch()
+        (tmp_path / "module.py").touch()
+        (tmp_path / "link").symlink_to(tmp_path / "package")
+        (tmp_path / "dangling").symlink_to(tmp_path / "missing")
+        (tmp_path / "kept.py").touch()
+
+        remove_all(
+            [
+                tmp_path / "package",
+                tmp_path / "module.py",
+                tmp_path / "link",
+                tmp_path / "dangling",
+                tmp_path / "kept.py",
+                tmp_path / "missing",
+            ],
+            protected=[tmp_path / "kept.py"],
+        )
+
+        assert _remaining(tmp_path) == ["kept.py"]
+
+
+class TestRemoveMatchingRegex:
+    def test_basic(self, tmp_path: Path) -> None:
+        for name in ["a/tests/test_a.py", "a/a.py", "b/tests/test_b.py", "tests.py"]:
+            (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / name).touch()
+
+        remove_matching_regex(tmp_path, re.compile(r"^[^/]+/tests|^tests\.py$"))
+
+        assert _remaining(tmp_path) == ["a", "a/a.py", "b"]
+
+    def test_adjacent_matching_directories(self, tmp_path: Path) -> None:
+        for name in ["a", "b", "c"]:
+            (tmp_path / "pkg" / name).mkdir(parents=True)
+
+        remove_matching_regex(tmp_path, r"^pkg/[ab]$")
+
+        assert _remaining(tmp_path) == ["pkg", "pkg/c"]
+
+    def test_symlinked_directory(self, tmp_path: Path) -> None:
+        (tmp_path / "real").mkdir()
+        (tmp_path / "real" / "file.py").touch()
+        (tmp_path / "link").symlink_to(tmp_path / "real")
+
+        remove_matching_regex(tmp_path, r"^link$")
+
+        assert _remaining(tmp_path) == ["real", "real/file.py"]
+
+    def test_skips_directories_that_cannot_match(
+        self, tmp_path: Path, mocker: MockerFixture
+    ) -> None:
+        for name in ["a/tests/test_a.py", "b/tests/test_b.py", "b/deep/er/c.py"]:
+            (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / name).touch()
+        scandir = mocker.patch("vendoring.utils.os.scandir", wraps=os.scandir)
+
+        remove_matching_regex(tmp_path, r"^a/tests$")
+
+        scanned = [c.args[0] for c in scandir.call_args_list]
+        assert str(tmp_path / "b") not in scanned
+        assert _remaining(tmp_path) == [
+            "a",
+            "b",
+            "b/deep",
+            "b/deep/er",
+            "b/deep/er/c.py",
+            "b/tests",
+            "b/tests/test_b.py",
+        ]
+
+
+class TestRemoveMatchingRegexes:
+    def test_basic(self, tmp_path: Path, mocker: MockerFixture) -> None:
+        for name in ["a/tests/test_a.py", "b/docs/index.rst", "b/b.py", "c/c.py"]:
+            (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / name).touch()
+        scandir = mocker.patch("vendoring.utils.os.scandir", wraps=os.scandir)
+
+        remove_matching_regexes(tmp_path, [r"^a/tests$", re.compile(r"^b/docs")])
+
+        scanned = [c.args[0] for c in scandir.call_args_list]
+        assert scanned.count(str(tmp_path)) == 1
+        assert str(tmp_path / "c") not in scanned
+        assert _remaining(tmp_path) == ["a", "b", "b/b.py", "c", "c/c.py"]
+
+    def test_no_patterns(self, tmp_path: Path) -> None:
+        (tmp_path / "a.py").touch()
+
+        remove_matching_regexes(tmp_path, [])
+
+        assert _remaining(tmp_path) == ["a.py"]
+
+
+class TestRun:
+    def test_logs_output(self, mocker: MockerFixture) -> None:
+        log = mocker.patch("vendoring.utils.UI.log")
+        script = "print('one'); print(); print('two  ')"
+
+        run([sys.executable, "-c", script], working_directory=None)
+
+        assert [c.args[0] for c in log.call_args_list][1:] == ["one", "two"]
+
+    def test_failure(self, mocker: MockerFixture) -> None:
+        mocker.patch("vendoring.utils.UI.log")
+
+        with pytest.raises(VendoringError, match="exit code: 3"):
+            run([sys.executable, "-c", "raise SystemExit(3)"], working_directory=None)
+
+    @pytest.mark.parametrize("hides_messages", [True, False])
+    def test_quiet_logs_output_on_failure(
+        self, mocker: MockerFixture, hides_messages: bool
+    ) -> None:
+        ui = mocker.patch("vendoring.utils.UI")
+        ui.hides_messages = hides_messages
+        script = "print('one'); raise SystemExit(1)"
+
+        with pytest.raises(VendoringError):
+            run([sys.executable, "-c", script], working_directory=None, quiet=True)
+
+        assert [c.args[0] for c in ui.log.call_args_list][1:] == ["one"]
+
+    def test_quiet_hides_output_on_success(self, mocker: MockerFixture) -> None:
+        ui = mocker.patch("vendoring.utils.UI")
+        ui.hides_messages = True
+
+        run([sys.executable, "-c", "print('one')"], working_directory=None, quiet=True)
+
+        assert len(ui.log.call_args_list) == 1  # just the command
+
+    def test_quiet_spins_while_running(self, mocker: MockerFixture) -> None:
+        ui = mocker.patch("vendoring.utils.UI")
+        ui.hides_messages = True
+        script = "import time; time.sleep(0.5)"
+
+        run([sys.executable, "-c", script], working_directory=None, quiet=True)
+
+        assert ui.spin.called
+
+
+class TestSession:
+    def test_shared(self) -> None:
+        try:
+            assert get_session() is get_session()
+        finally:
+            close_session()
+
+    def test_close_session(self, mocker: MockerFixture) -> None:
+        session = get_session()
+        close = mocker.patch.object(session, "close")
+
+        close_session()
+
+        close.assert_called_once_with()
+        assert get_session() is not session
+        close_session()
+
+    def test_close_without_session(self) -> None:
+        close_session()
+        close_session()
+
+        assert get_session.cache_info().currsize == 0
@@ -1,12 +1,21 @@
 """Unit tests for `vendoring.tasks.vendor`"""
 
+import os
+import re
 import textwrap
 from pathlib import Path
 
 import pytest
+from pytest_mock import MockerFixture
 
 from vendoring.errors import VendoringError
-from vendoring.tasks.vendor import rewrite_file_imports
+from vendoring.tasks.vendor import (
+    detect_vendored_libs,
+    remove_unnecessary_items,
+    rewrite_file_imports,
+    rewrite_imports,
+    rewrite_text_imports,
+)
 
 _SUPPORTED_IMPORT_FORMS = textwrap.dedent(
     """\
@@ -19,6 +28,121 @@ _SUPPORTED_IMPORT_FORMS = textwrap.dedent(
     """
 )
 
+_SUBSTITUTIONS = [{"match": r"name(\d)", "replace": r"NAME\1"}]
+
+# Expected result of rewriting _SUPPORTED_IMPORT_FORMS, per (namespace, substitute)
+_EXPECTED_REWRITES = {
+    ("namespace", False): textwrap.dedent(
+        """\
+            from namespace import other
+            from namespace import other # with comment
+            from namespace import other as somethingelse
+            from namespace.other import name1
+            from namespace.other.name2 import name3
+            import namespace.other.name4 as name5
+        """
+    ),
+    ("", False): _SUPPORTED_IMPORT_FORMS,
+    ("namespace", True): textwrap.dedent(
+        """\
+            from namespace import other
+            from namespace import other # with comment
+            from namespace import other as somethingelse
+            from namespace.other import NAME1
+            from namespace.other.NAME2 import NAME3
+            import namespace.other.NAME4 as NAME5
+        """
+    ),
+    ("", True): textwrap.dedent(
+        """\
+            import other
+            import other # with comment
+            import other as somethingelse
+            from other import NAME1
+            from other.NAME2 import NAME3
+            import other.NAME4 as NAME5
+        """
+    ),
+}
+
+# Libraries whose names prefix one another, and an unrelated one.
+_MULTIPLE_LIBRARIES_FORMS = textwrap.dedent(
+    """\
+        import oth
+        import other
+        import others
+        from oth.er import name1
+        from other import name2
+        import unrelated
+    """
+)
+_MULTIPLE_LIBRARIES_REWRITTEN = textwrap.dedent(
+    """\
+        from namespace import oth
+        from namespace import other
+        import others
+        from namespace.oth.er import name1
+        from namespace.other import name2
+        import unrelated
+    """
+)
+
+
+class TestRemoveUnnecessaryItems:
+    def test_recursive_glob(self, tmp_path: Path) -> None:
+        (tmp_path / "pkg" / "tests" / "sub").mkdir(parents=True)
+        for i in range(10):
+            (tmp_path / "pkg" / "tests" / f"test_{i}.py").touch()
+            (tmp_path / "pkg" / "tests" / "sub" / f"test_{i}.py").touch()
+
+        remove_unnecessary_items(tmp_path, ["**/test*"])
+
+        assert [p.name for p in tmp_path.iterdir()] == ["pkg"]
+        assert list((tmp_path / "pkg").iterdir()) == []
+
+
+class TestRewriteTextImports:
+    @pytest.mark.parametrize(
+        ["namespace", "substitute"],
+        [("namespace", False), ("", False), ("namespace", True), ("", True)],
+        ids=["namespace", "no-namespace", "namespace-substitutions", "substitutions"],
+    )
+    def test_rewrite(self, namespace: str, substitute: bool) -> None:
+        text = rewrite_text_imports(
+            _SUPPORTED_IMPORT_FORMS,
+            namespace=namespace,
+            vendored_libs=["other"],
+            additional_substitutions=_SUBSTITUTIONS if substitute else [],
+        )
+
+        assert text == _EXPECTED_REWRITES[namespace, substitute]
+
+    def test_multiple_libraries(self) -> None:
+        text = rewrite_text_imports(
+            _MULTIPLE_LIBRARIES_FORMS,
+            namespace="namespace",
+            vendored_libs=["oth", "other"],
+            additional_substitutions=[],
+        )
+
+        assert text == _MULTIPLE_LIBRARIES_REWRITTEN
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "import other.shouldfail\n",
+            "import other.shouldfail  # comment\n",
+        ],
+    )
+    def test_dot_import_without_alias(self, text: str) -> None:
+        with pytest.raises(VendoringError, match='File "<string>", line 1'):
+            rewrite_text_imports(
+                text,
+                namespace="namespace",
+                vendored_libs=["other"],
+                additional_substitutions=[],
+            )
+
 
 class TestRewriteFileImports:
     def test_basic(self, tmp_path: Path) -> None:
@@ -32,83 +156,82 @@ class TestRewriteFileImports:
             additional_substitutions=[],
         )
 
-        assert path.read_text() == textwrap.dedent(
-            """\
-                from namespace import other
-                from namespace import other # with comment
-                from namespace import other as somethingelse
-                from namespace.other import name1
-                from namespace.other.name2 import name3
-                import namespace.other.name4 as name5
-            """
-        )
+        assert path.read_text() == _EXPECTED_REWRITES["namespace", False]
 
-    def test_does_not_rewrite_on_empty_namespace(self, tmp_path: Path) -> None:
+    def test_substitutions_can_introduce_imports(self, tmp_path: Path) -> None:
         path = tmp_path / "module.py"
-        path.write_text(_SUPPORTED_IMPORT_FORMS)
+        path.write_text("import placeholder\n")
 
         rewrite_file_imports(
             path,
-            namespace="",
+            namespace="namespace",
             vendored_libs=["other"],
-            additional_substitutions=[],
+            additional_substitutions=[{"match": "placeholder", "replace": "other"}],
         )
 
-        assert path.read_text() == _SUPPORTED_IMPORT_FORMS
+        assert path.read_text() == "from namespace import other\n"
 
-    def test_additional_substitutions_are_made(self, tmp_path: Path) -> None:
+    @pytest.mark.parametrize(
+        "contents",
+        [
+            "import unrelated\n",
+            "from namespace import other\n",
+            "other = 1\n",
+        ],
+    )
+    def test_unchanged_file_is_not_written(
+        self, tmp_path: Path, mocker: MockerFixture, contents: str
+    ) -> None:
         path = tmp_path / "module.py"
-        path.write_text(_SUPPORTED_IMPORT_FORMS)
+        path.write_text(contents)
+        write_bytes = mocker.patch.object(Path, "write_bytes")
 
         rewrite_file_imports(
             path,
             namespace="namespace",
             vendored_libs=["other"],
-            additional_substitutions=[{"match": r"name(\d)", "replace": r"NAME\1"}],
+            additional_substitutions=[],
         )
 
-        assert path.read_text() == textwrap.dedent(
-            """\
-                from namespace import other
-                from namespace import other # with comment
-                from namespace import other as somethingelse
-                from namespace.other import NAME1
-                from namespace.other.NAME2 import NAME3
-                import namespace.other.NAME4 as NAME5
-            """
-        )
+        write_bytes.assert_not_called()
 
-    def test_additional_substitutions_are_made_on_empty_namespace(
-        self, tmp_path: Path
-    ) -> None:
+    @pytest.mark.parametrize("namespace", ["", "namespace"])
+    def test_line_endings_are_normalized(self, tmp_path: Path, namespace: str) -> None:
         path = tmp_path / "module.py"
-        path.write_text(_SUPPORTED_IMPORT_FORMS)
+        path.write_bytes(b"import os\r\nimport sys\r\n")
 
         rewrite_file_imports(
             path,
-            namespace="",
+            namespace=namespace,
             vendored_libs=["other"],
-            additional_substitutions=[{"match": r"name(\d)", "replace": r"NAME\1"}],
+            additional_substitutions=[],
         )
 
-        assert path.read_text() == textwrap.dedent(
-            """\
-                import other
-                import other # with comment
-                import other as somethingelse
-                from other import NAME1
-                from other.NAME2 import NAME3
-                import other.NAME4 as NAME5
-            """
+        expected = f"import os{os.linesep}import sys{os.linesep}"
+        assert path.read_bytes() == expected.encode()
+
+    @pytest.mark.parametrize("namespace", ["", "namespace"])
+    def test_line_endings_are_platform_native(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, namespace: str
+    ) -> None:
+        monkeypatch.setattr(os, "linesep", "\r\n")
+        path = tmp_path / "module.py"
+        path.write_bytes(b"import os\nimport sys\r\nimport re\r")
+
+        rewrite_file_imports(
+            path,
+            namespace=namespace,
+            vendored_libs=["other"],
+            additional_substitutions=[],
         )
 
+        assert path.read_bytes() == b"import os\r\nimport sys\r\nimport re\r\n"
 
-class TestCannotRewriteFileImports:
-    def test_dot_import_without_alias(self, tmp_path: Path) -> None:
+    def test_errors_mention_the_file(self, tmp_path: Path) -> None:
         path = tmp_path / "module.py"
         path.write_text("import other.shouldfail\n")
 
-        with pytest.raises(VendoringError):
+        with pytest.raises(VendoringError, match=re.escape(f'File "{path}", line 1')):
             rewrite_file_imports(
                 path,
                 namespace="namespace",
@@ -116,14 +239,56 @@ class TestCannotRewriteFileImports:
                 additional_substitutions=[],
             )
 
-    def test_dot_import_without_alias_but_with_comment(self, tmp_path: Path) -> None:
-        path = tmp_path / "module.py"
-        path.write_text("import other.shouldfail  # comment\n")
+
+class TestRewriteImports:
+    @pytest.mark.parametrize("count", [1, 100])
+    def test_rewrites_all_files(self, tmp_path: Path, count: int) -> None:
+        paths = [tmp_path / "other" / f"module{i}.py" for i in range(count)]
+        paths.append(tmp_path / "other" / "sub" / "module.py")
+        paths.append(tmp_path / "toplevel.py")
+        for path in paths:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(_SUPPORTED_IMPORT_FORMS)
+        (tmp_path / "other" / "data.txt").write_text("import other\n")
+
+        rewrite_imports(
+            tmp_path,
+            namespace="namespace",
+            vendored_libs=["other"],
+            additional_substitutions=[],
+        )
+
+        for path in paths:
+            assert path.read_text() == _EXPECTED_REWRITES["namespace", False]
+        assert (tmp_path / "other" / "data.txt").read_text() == "import other\n"
+
+    @pytest.mark.parametrize("count", [1, 100])
+    def test_errors_are_propagated(self, tmp_path: Path, count: int) -> None:
+        for i in range(count):
+            (tmp_path / f"module{i}.py").write_text("import other\n")
+        (tmp_path / "bad.py").write_text("import other.shouldfail\n")
 
         with pytest.raises(VendoringError):
-            rewrite_file_imports(
-                path,
+            rewrite_imports(
+                tmp_path,
                 namespace="namespace",
                 vendored_libs=["other"],
                 additional_substitutions=[],
             )
+
+
+class TestDetectVendoredLibs:
+    def test_basic(self, tmp_path: Path, mocker: MockerFixture) -> None:
+        (tmp_path / "package").mkdir()
+        (tmp_path / "module.py").touch()
+        (tmp_path / "module.pyi").touch()
+        (tmp_path / "vendor.txt").touch()
+        (tmp_path / "README.md").touch()
+        warn = mocker.patch("vendoring.tasks.vendor.UI.warn")
+
+        libs = detect_vendored_libs(tmp_path, files_to_skip=["vendor.txt"])
+
+        assert sorted(libs) == ["module", "package"]
+        warn.assert_called_once_with(
+            f"Got unexpected non-Python file: {tmp_path / 'README.md'}"
+        )